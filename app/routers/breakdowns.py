@@ -7,6 +7,7 @@ import json
 import logging
 import os
 from supabase import create_client, Client
+from app.supabase_client import execute_async
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -222,7 +223,7 @@ async def get_breakdowns(
         if department and department != "all":
             query = query.eq("department", department)
         
-        response = query.order("created_at", desc=True).range(offset, offset + limit - 1).execute()
+        response = await execute_async(query.order("created_at", desc=True).range(offset, offset + limit - 1))
         
         records = response.data or []
         # Parse spares_used JSON string back to list
@@ -288,7 +289,7 @@ async def create_breakdown(breakdown: BreakdownCreate):
         logger.info(f"Inserting breakdown with {len(data)} fields")
         
         # Insert into database
-        response = db.table("breakdowns").insert(data).execute()
+        response = await execute_async(db.table("breakdowns").insert(data))
         
         if response.data:
             result = response.data[0]
@@ -319,7 +320,7 @@ async def get_breakdown(breakdown_id: int):
     db = check_supabase()
     
     try:
-        response = db.table("breakdowns").select("*").eq("id", breakdown_id).execute()
+        response = await execute_async(db.table("breakdowns").select("*").eq("id", breakdown_id))
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Breakdown not found")
@@ -347,7 +348,7 @@ async def update_breakdown(breakdown_id: int, breakdown_update: BreakdownUpdate)
     
     try:
         # Check if exists
-        existing = db.table("breakdowns").select("*").eq("id", breakdown_id).execute()
+        existing = await execute_async(db.table("breakdowns").select("*").eq("id", breakdown_id))
         if not existing.data:
             raise HTTPException(status_code=404, detail="Breakdown not found")
         
@@ -393,7 +394,7 @@ async def update_breakdown(breakdown_id: int, breakdown_update: BreakdownUpdate)
         update_data = {k: v for k, v in update_data.items() if k in expected_columns}
         
         # Update in database
-        response = db.table("breakdowns").update(update_data).eq("id", breakdown_id).execute()
+        response = await execute_async(db.table("breakdowns").update(update_data).eq("id", breakdown_id))
         
         if response.data:
             result = response.data[0]
@@ -421,12 +422,12 @@ async def delete_breakdown(breakdown_id: int):
     
     try:
         # Check if exists
-        existing = db.table("breakdowns").select("*").eq("id", breakdown_id).execute()
+        existing = await execute_async(db.table("breakdowns").select("*").eq("id", breakdown_id))
         if not existing.data:
             raise HTTPException(status_code=404, detail="Breakdown not found")
         
         # Delete
-        db.table("breakdowns").delete().eq("id", breakdown_id).execute()
+        await execute_async(db.table("breakdowns").delete().eq("id", breakdown_id))
         
         return {"success": True, "message": "Breakdown deleted successfully"}
         
@@ -442,7 +443,7 @@ async def get_dashboard_overview():
     db = check_supabase()
     
     try:
-        response = db.table("breakdowns").select("*").execute()
+        response = await execute_async(db.table("breakdowns").select("*"))
         records = response.data or []
         
         total = len(records)
@@ -503,7 +504,7 @@ async def health_check():
             }
         
         # Test connection
-        result = supabase.table("breakdowns").select("id", count="exact").limit(1).execute()
+        result = await execute_async(supabase.table("breakdowns").select("id", count="exact").limit(1))
         
         return {
             "status": "healthy",
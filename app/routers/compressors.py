@@ -4,10 +4,14 @@
 import os
 import json
 import uuid
-from datetime import datetime, timedelta
+import operator
+import bisect
+import re
+import logging
+from datetime import date, datetime, timedelta
 from typing import List, Dict, Optional, Any, Tuple
 from enum import Enum
-from collections import defaultdict
+from collections import defaultdict, Counter
 
 import supabase
 from dotenv import load_dotenv
@@ -21,6 +25,8 @@ import pandas as pd
 import io
 import csv
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 load_dotenv()
 
@@ -33,6 +39,20 @@ MAINTENANCE_SCHEDULE_TABLE = "maintenance_schedule"
 ALERTS_TABLE = "alerts"
 SERVICE_INTERVALS_TABLE = "service_intervals"
 
+# Readings are always fetched per compressor ordered by date, backed by:
+#   CREATE INDEX CONCURRENTLY idx_readings_comp_date_desc
+#       ON compressor_readings (compressor_id, date DESC);
+
+# Postgres function backing get_stats (aggregates computed in the database),
+# created by migrations/004_compressors_stats_summary.sql
+STATS_SUMMARY_RPC = "stats_summary"
+
+# YYYY-MM-DD with month 01-12 and day 01-31; a cheap shape check before the calendar check
+_DATE_RE = re.compile(r"\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])")
+
+# Sort rank for service urgency levels (most urgent first)
+_URGENCY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
 # Create router
 router = APIRouter()
 
@@ -50,6 +70,10 @@ class ServiceUrgency(str, Enum):
     LOW = "low"             # Due in 31+ days
     COMPLETED = "completed"  # Service completed
 
+# Upper bounds (inclusive, in days remaining) for each urgency level; anything above is LOW
+_URGENCY_THRESHOLDS = (0, 7, 30)
+_URGENCY_LEVELS = (ServiceUrgency.CRITICAL, ServiceUrgency.HIGH, ServiceUrgency.MEDIUM, ServiceUrgency.LOW)
+
 class AlertType(str, Enum):
     MAINTENANCE_DUE = "maintenance_due"
     EFFICIENCY_LOW = "efficiency_low"
@@ -204,15 +228,7 @@ def calculate_efficiency(running_hours: float, loaded_hours: float) -> float:
 def get_service_urgency(hours_until_service: float, avg_daily_hours: float = 8.0) -> ServiceUrgency:
     """Determine service urgency based on days remaining"""
     days_remaining = hours_until_service / avg_daily_hours
-    
-    if days_remaining <= 0:
-        return ServiceUrgency.CRITICAL
-    elif days_remaining <= 7:
-        return ServiceUrgency.HIGH
-    elif days_remaining <= 30:
-        return ServiceUrgency.MEDIUM
-    else:
-        return ServiceUrgency.LOW
+    return _URGENCY_LEVELS[bisect.bisect_left(_URGENCY_THRESHOLDS, days_remaining)]
 
 def generate_service_intervals(current_hours: float) -> List[int]:
     """Generate upcoming service intervals"""
@@ -226,9 +242,11 @@ def calculate_daily_hours(previous_total: float, current_total: float) -> float:
     return round(daily, 2)
 
 def validate_date_format(date_str: str) -> bool:
-    """Validate date format (YYYY-MM-DD)"""
+    """Validate date format (YYYY-MM-DD) and that the date exists in the calendar"""
+    if _DATE_RE.fullmatch(date_str) is None:
+        return False
     try:
-        datetime.strptime(date_str, "%Y-%m-%d")
+        date.fromisoformat(date_str)
         return True
     except ValueError:
         return False
@@ -420,9 +438,10 @@ async def create_compressor(
     """Create a new compressor"""
     try:
         compressor_data = compressor.dict()
+        now_iso = datetime.utcnow().isoformat()
         compressor_data["id"] = str(uuid.uuid4())
-        compressor_data["created_at"] = datetime.utcnow().isoformat()
-        compressor_data["updated_at"] = datetime.utcnow().isoformat()
+        compressor_data["created_at"] = now_iso
+        compressor_data["updated_at"] = now_iso
         
         # Set initial totals if not provided
         if compressor_data.get("initial_total_running") is None:
@@ -537,7 +556,7 @@ async def create_daily_entry_cumulative(
         if not validate_date_format(date_str):
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
         
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
+        date_obj = date.fromisoformat(date_str)
         
         # Get compressor info
         compressor_result = supabase_client.table(COMPRESSORS_TABLE)\
@@ -623,6 +642,7 @@ async def create_daily_entry_cumulative(
         
         # Calculate efficiency
         efficiency = calculate_efficiency(daily_running, daily_loaded)
+        now_iso = datetime.utcnow().isoformat()
         
         # Create reading entry
         reading_data = {
@@ -637,14 +657,14 @@ async def create_daily_entry_cumulative(
             "pressure": request.pressure,
             "temperature": request.temperature,
             "notes": request.notes,
-            "updated_at": datetime.utcnow().isoformat()
+            "updated_at": now_iso
         }
         
         # If there's an existing reading, also add created_at
         if existing_reading:
             reading_data["created_at"] = existing_reading["created_at"]
         else:
-            reading_data["created_at"] = datetime.utcnow().isoformat()
+            reading_data["created_at"] = now_iso
         
         # Save to database
         try:
@@ -677,7 +697,7 @@ async def create_daily_entry_cumulative(
                         "daily_loaded_hours": daily_loaded,
                         "total_loaded_hours": request.current_total_loaded,
                         "efficiency": efficiency,
-                        "updated_at": datetime.utcnow().isoformat()
+                        "updated_at": now_iso
                     })
                     
                     # Retry the operation
@@ -708,7 +728,7 @@ async def create_daily_entry_cumulative(
                     .update({
                         "total_running_hours": request.current_total_running,
                         "total_loaded_hours": request.current_total_loaded,
-                        "updated_at": datetime.utcnow().isoformat()
+                        "updated_at": now_iso
                     })\
                     .eq("id", compressor_id)\
                     .execute()
@@ -802,18 +822,22 @@ async def get_detailed_readings(
         readings = result.data
         cumulative_running = initial_running
         cumulative_loaded = initial_loaded
+        total_running_hours = 0
+        total_loaded_hours = 0
         
         for reading in readings:
-            # Add calculated values
-            reading["cumulative_running"] = cumulative_running + reading.get("daily_running_hours", 0)
-            reading["cumulative_loaded"] = cumulative_loaded + reading.get("daily_loaded_hours", 0)
+            daily_running = reading.get("daily_running_hours") or 0
+            daily_loaded = reading.get("daily_loaded_hours") or 0
             
             # Update running totals
-            cumulative_running = reading["cumulative_running"]
-            cumulative_loaded = reading["cumulative_loaded"]
-        
-        total_running_hours = sum(r.get("daily_running_hours", 0) for r in readings)
-        total_loaded_hours = sum(r.get("daily_loaded_hours", 0) for r in readings)
+            cumulative_running += daily_running
+            cumulative_loaded += daily_loaded
+            total_running_hours += daily_running
+            total_loaded_hours += daily_loaded
+            
+            # Add calculated values
+            reading["cumulative_running"] = cumulative_running
+            reading["cumulative_loaded"] = cumulative_loaded
         
         return {
             "success": True,
@@ -892,27 +916,22 @@ async def check_and_update_service_due(compressor_id: str, current_hours: float,
         
         hours_remaining = next_interval["interval_hours"] - current_hours
         days_remaining = max(0, int(hours_remaining / 8))  # Assuming 8 hours/day
+        now_iso = datetime.utcnow().isoformat()
+        service_date_iso = (datetime.now() + timedelta(days=days_remaining)).date().isoformat()
         
         # Determine urgency
-        if days_remaining <= 0:
-            urgency = "critical"
-        elif days_remaining <= 7:
-            urgency = "high"
-        elif days_remaining <= 30:
-            urgency = "medium"
-        else:
-            urgency = "low"
+        urgency = _URGENCY_LEVELS[bisect.bisect_left(_URGENCY_THRESHOLDS, days_remaining)].value
         
         # Update or create maintenance schedule
         maintenance_data = {
             "compressor_id": compressor_id,
             "service_type": f"{next_interval['interval_hours']} Hour Service",
             "service_interval_hours": next_interval["interval_hours"],
-            "next_service_date": (datetime.now() + timedelta(days=days_remaining)).date().isoformat(),
-            "estimated_service_date": (datetime.now() + timedelta(days=days_remaining)).date().isoformat(),
+            "next_service_date": service_date_iso,
+            "estimated_service_date": service_date_iso,
             "urgency": urgency,
             "is_active": True,
-            "updated_at": datetime.utcnow().isoformat()
+            "updated_at": now_iso
         }
         
         # Check if maintenance schedule already exists
@@ -932,7 +951,7 @@ async def check_and_update_service_due(compressor_id: str, current_hours: float,
         else:
             # Create new
             maintenance_data["id"] = str(uuid.uuid4())
-            maintenance_data["created_at"] = datetime.utcnow().isoformat()
+            maintenance_data["created_at"] = now_iso
             supabase_client.table(MAINTENANCE_SCHEDULE_TABLE).insert(maintenance_data).execute()
         
         # Create alert if urgent
@@ -946,8 +965,8 @@ async def check_and_update_service_due(compressor_id: str, current_hours: float,
                 "severity": "critical" if urgency == "critical" else "warning",
                 "is_read": False,
                 "is_resolved": False,
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
+                "created_at": now_iso,
+                "updated_at": now_iso
             }
             supabase_client.table(ALERTS_TABLE).insert(alert_data).execute()
             
@@ -959,8 +978,28 @@ async def check_and_update_service_due(compressor_id: str, current_hours: float,
 async def get_stats(supabase_client = Depends(get_supabase)):
     """Get system statistics"""
     try:
+        # Get aggregated stats from the database
+        try:
+            stats_result = supabase_client.rpc(STATS_SUMMARY_RPC).execute()
+            summary = stats_result.data[0] if stats_result.data else None
+        except Exception as rpc_error:
+            logger.warning(f"stats_summary RPC unavailable, calculating manually: {rpc_error}")
+            summary = None
+        
+        if summary:
+            return {
+                "total_compressors": summary.get("total_compressors") or 0,
+                "total_running_hours": round(summary.get("total_running_hours") or 0.0, 1),
+                "total_loaded_hours": round(summary.get("total_loaded_hours") or 0.0, 1),
+                "avg_efficiency": round(summary.get("avg_efficiency") or 0.0, 1),
+                "active_compressors": summary.get("active_compressors") or 0,
+                "upcoming_services": summary.get("upcoming_services") or 0,
+                "urgent_alerts": 0  # Placeholder
+            }
+        
+        # Fallback: Calculate manually
         # Get all compressors
-        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("*").execute()
+        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("total_running_hours,total_loaded_hours,status").execute()
         compressors = compressors_result.data if compressors_result.data else []
         
         if not compressors:
@@ -1020,7 +1059,7 @@ async def get_stats(supabase_client = Depends(get_supabase)):
 async def get_service_due(supabase_client = Depends(get_supabase)):
     """Get compressors with upcoming services"""
     try:
-        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("*").execute()
+        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("id,name,total_running_hours").execute()
         compressors = compressors_result.data if compressors_result.data else []
         
         service_due_list = []
@@ -1038,7 +1077,8 @@ async def get_service_due(supabase_client = Depends(get_supabase)):
             
             urgency_level = get_service_urgency(hours_remaining)
             
-            service_due_list.append({
+            # Tag each entry with its urgency rank so the sort key is a plain lookup
+            service_due_list.append((_URGENCY_RANK.get(urgency_level.value, 4), {
                 "compressor_id": compressor["id"],
                 "compressor_name": compressor["name"],
                 "current_hours": current_hours,
@@ -1047,13 +1087,12 @@ async def get_service_due(supabase_client = Depends(get_supabase)):
                 "days_remaining": days_remaining,
                 "urgency": urgency_level.value,
                 "service_interval": next_service
-            })
+            }))
         
         # Sort by urgency
-        urgency_order = {"critical": 0, "high": 1, "medium": 2, "low": 3}
-        service_due_list.sort(key=lambda x: urgency_order.get(x["urgency"], 4))
+        service_due_list.sort(key=operator.itemgetter(0))
         
-        return service_due_list
+        return [entry for _, entry in service_due_list]
     except Exception as e:
         print(f"Error checking service due: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error checking service due: {str(e)}")
@@ -1066,7 +1105,7 @@ async def get_performance_metrics(
 ):
     """Get performance metrics"""
     try:
-        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("*").execute()
+        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("id,name,total_running_hours,total_loaded_hours").execute()
         compressors = compressors_result.data if compressors_result.data else []
 
         metrics = []
@@ -1099,16 +1138,28 @@ async def get_performance_metrics(
             
             # Calculate metrics from actual readings
             total_readings = len(readings)
-            total_running = sum(r.get("daily_running_hours", 0) for r in readings)
-            total_loaded = sum(r.get("daily_loaded_hours", 0) for r in readings)
-            efficiencies = [r.get("efficiency", 0) for r in readings if r.get("efficiency", 0) > 0]
+            total_running = 0
+            total_loaded = 0
+            efficiency_sum = 0
+            efficiency_count = 0
+            zero_running_days = 0  # Downtime (days with 0 running hours)
             
-            avg_efficiency = sum(efficiencies) / len(efficiencies) if efficiencies else 0
+            for r in readings:
+                daily_running = r.get("daily_running_hours") or 0
+                efficiency = r.get("efficiency") or 0
+                
+                total_running += daily_running
+                total_loaded += r.get("daily_loaded_hours") or 0
+                if efficiency > 0:
+                    efficiency_sum += efficiency
+                    efficiency_count += 1
+                if daily_running == 0:
+                    zero_running_days += 1
+            
+            avg_efficiency = efficiency_sum / efficiency_count if efficiency_count else 0
             avg_daily_running = total_running / total_readings if total_readings > 0 else 0
             avg_daily_loaded = total_loaded / total_readings if total_readings > 0 else 0
             
-            # Calculate downtime (days with 0 running hours)
-            zero_running_days = sum(1 for r in readings if r.get("daily_running_hours", 0) == 0)
             downtime_percentage = (zero_running_days / total_readings * 100) if total_readings > 0 else 0
             
             metrics.append({
@@ -1138,7 +1189,7 @@ async def get_trend_analysis(
     """Get trend analysis data"""
     try:
         # Check if we have any readings at all
-        readings_result = supabase_client.table(READINGS_TABLE).select("*").limit(1).execute()
+        readings_result = supabase_client.table(READINGS_TABLE).select("id").limit(1).execute()
         
         if not readings_result.data or len(readings_result.data) == 0:
             # Return proper structure with empty array and success message
@@ -1151,17 +1202,19 @@ async def get_trend_analysis(
         
         # If there's data, implement trend analysis
         # Get all compressors
-        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("*").execute()
+        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("id,name").execute()
         compressors = compressors_result.data if compressors_result.data else []
         
         trends = []
         
         for compressor in compressors:
             # Get readings for this compressor
+            # Only the latest two weeks are compared
             readings_result = supabase_client.table(READINGS_TABLE)\
                 .select("*")\
                 .eq("compressor_id", compressor["id"])\
                 .order("date", desc=True)\
+                .limit(14)\
                 .execute()
             
             readings = readings_result.data if readings_result.data else []
@@ -1175,8 +1228,13 @@ async def get_trend_analysis(
                 older = readings[7:14] if len(readings) >= 14 else []
                 
                 if older:
-                    recent_efficiency = sum(r.get("efficiency", 0) for r in recent) / len(recent)
-                    older_efficiency = sum(r.get("efficiency", 0) for r in older) / len(older)
+                    # Materialize efficiencies once and average both windows in numpy
+                    eff = np.fromiter(
+                        (r.get("efficiency", 0) or 0 for r in readings[:14]),
+                        dtype=float
+                    )
+                    recent_efficiency = float(eff[:7].mean())
+                    older_efficiency = float(eff[7:14].mean())
                     
                     efficiency_trend = "stable"
                     if recent_efficiency > older_efficiency + 5:
@@ -1189,8 +1247,8 @@ async def get_trend_analysis(
                         "compressor_name": compressor["name"],
                         "period": period,
                         "avg_efficiency": round(recent_efficiency, 1),
-                        "total_running_hours": sum(r.get("daily_running_hours", 0) for r in recent),
-                        "total_loaded_hours": sum(r.get("daily_loaded_hours", 0) for r in recent),
+                        "total_running_hours": sum(r.get("daily_running_hours") or 0 for r in recent),
+                        "total_loaded_hours": sum(r.get("daily_loaded_hours") or 0 for r in recent),
                         "efficiency_trend": efficiency_trend,
                         "has_data": True
                     })
@@ -1218,7 +1276,7 @@ async def get_comparison_analytics(
 ):
     """Get comparison analytics for compressors"""
     try:
-        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("*").execute()
+        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("id,name,location,total_running_hours,total_loaded_hours").execute()
         compressors = compressors_result.data if compressors_result.data else []
 
         comparison_data = []
@@ -1288,25 +1346,18 @@ async def get_comparison_analytics(
 async def get_management_summary(supabase_client = Depends(get_supabase)):
     """Get management summary"""
     try:
-        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("*").execute()
+        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("status,location").execute()
         compressors = compressors_result.data if compressors_result.data else []
         
         # Calculate statistics
-        status_counts = {}
-        location_counts = {}
-        
-        for compressor in compressors:
-            status = compressor.get("status", "unknown")
-            location = compressor.get("location", "Unknown")
-            
-            status_counts[status] = status_counts.get(status, 0) + 1
-            location_counts[location] = location_counts.get(location, 0) + 1
+        status_counts = Counter(c.get("status", "unknown") for c in compressors)
+        location_counts = Counter(c.get("location", "Unknown") for c in compressors)
         
         return {
             "success": True,
             "total_compressors": len(compressors),
-            "status_distribution": status_counts,
-            "location_distribution": location_counts,
+            "status_distribution": dict(status_counts),
+            "location_distribution": dict(location_counts),
             "total_hours_by_location": {},
             "age_distribution": {
                 "less_than_year": len(compressors),
@@ -1335,7 +1386,7 @@ async def export_data(
     """Export data to CSV format"""
     try:
         # Get all compressors data
-        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("*").execute()
+        compressors_result = supabase_client.table(COMPRESSORS_TABLE).select("name,model,capacity,status,location,total_running_hours,total_loaded_hours").execute()
         compressors = compressors_result.data if compressors_result.data else []
         
         # Create CSV content
@@ -1380,6 +1431,7 @@ async def import_data(
         
         imported_count = 0
         errors = []
+        now_iso = datetime.utcnow().isoformat()
         
         for i, line in enumerate(lines[1:], start=2):  # Skip header
             try:
@@ -1396,8 +1448,8 @@ async def import_data(
                         "total_loaded_hours": float(values[6].strip()) if len(values) > 6 and values[6].strip() else 0.0,
                         "initial_total_running": float(values[5].strip()) if len(values) > 5 and values[5].strip() else 0.0,
                         "initial_total_loaded": float(values[6].strip()) if len(values) > 6 and values[6].strip() else 0.0,
-                        "created_at": datetime.utcnow().isoformat(),
-                        "updated_at": datetime.utcnow().isoformat()
+                        "created_at": now_iso,
+                        "updated_at": now_iso
                     }
                     
                     # Insert into database
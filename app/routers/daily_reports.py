@@ -1,40 +1,59 @@
 # backend/app/routers/daily_report.py
-from fastapi import APIRouter, HTTPException, Query, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-import json
+import heapq
 import logging
-from supabase import create_client, Client
-import os
-from dotenv import load_dotenv
-import traceback
+from cachetools import TTLCache
+from supabase import Client
+from app.supabase_client import SUPABASE_KEY, SUPABASE_URL, execute_async, supabase
 
-# Load environment variables
-load_dotenv()
-
-# Initialize logging
-logging.basicConfig(level=logging.INFO)
+# Initialize logging (handlers are configured once by the app in main.py)
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI router
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL", "")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
+# Handlers share the pooled module-level client; without credentials they fail
+# with 503 rather than serving made-up data
+def get_supabase() -> Client:
+    """Dependency returning the shared Supabase client"""
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise HTTPException(status_code=503, detail="Database is not configured")
+    return supabase
 
-supabase = None
-if SUPABASE_URL and SUPABASE_KEY:
-    try:
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        logger.info("✅ Supabase client initialized successfully")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Supabase: {e}")
-        supabase = None
-else:
-    logger.warning("⚠️ Supabase credentials not found. Running in local mode.")
+# Short-lived cache of report listings keyed by query parameters, cleared on every write
+_reports_cache = TTLCache(maxsize=32, ttl=15)
+
+# Postgres function backing get_stats_summary (aggregates computed in the database),
+# created by migrations/005_daily_report_stats.sql
+DAILY_REPORT_STATS_RPC = "daily_report_stats"
+
+# View and function backing get_equipment_performance_trend (equipment JSON is
+# unnested and grouped by name in the database), created by
+# migrations/006_equipment_performance_trend.sql
+EQUIPMENT_TREND_RPC = "equipment_performance_trend"
+
+# Schema this router relies on (migrations/003_daily_reports_schema.sql, applied
+# before deploying): call_outs and equipment are jsonb columns sent and returned as
+# native arrays, created_at/updated_at come from column defaults and an update
+# trigger, and create_report upserts on the daily_reports_date_key unique constraint
+
+# Columns that may be requested through the `fields` query parameter
+REPORT_COLUMNS = {
+    "id", "date", "safety", "projects", "weekly_plan", "daily_checks",
+    "power_availability", "dam_level", "plant_availability_percent",
+    "call_outs", "equipment", "notes", "created_at", "updated_at"
+}
+
+# Select lists for the fixed-shape queries, built once at import
+REPORTS_TABLE = "daily_reports"
+STATS_SELECT = "plant_availability_percent,dam_level,call_outs"
+PLANT_TREND_SELECT = "date,plant_availability_percent,dam_level"
+EQUIPMENT_TREND_SELECT = "date,equipment"
+TREND_WINDOW = 30
 
 # Pydantic Models
 class CallOut(BaseModel):
@@ -70,40 +89,17 @@ def format_supabase_response(data):
         return data.data
     return data
 
-def parse_json_fields(report: dict) -> dict:
-    """Parse JSON fields in report"""
-    if report.get('call_outs') and isinstance(report['call_outs'], str):
-        try:
-            report['call_outs'] = json.loads(report['call_outs'])
-        except:
-            report['call_outs'] = []
-    
-    if report.get('equipment') and isinstance(report['equipment'], str):
-        try:
-            report['equipment'] = json.loads(report['equipment'])
-        except:
-            report['equipment'] = []
-    
-    return report
-
 # ===== REMOVED DUPLICATE ROOT ENDPOINT =====
 # The root endpoint was causing conflict with get_reports
 # Both were @router.get("/") - removed one to fix the conflict
 
 # Health check endpoint
 @router.get("/health/check")
-async def health_check():
+async def health_check(supabase: Client = Depends(get_supabase)):
     """Check database health"""
     try:
-        if not supabase:
-            return {
-                "status": "connected",
-                "report_count": 0,
-                "message": "Running in local mode"
-            }
-        
         # Test connection
-        result = supabase.table("daily_reports").select("*", count="exact").limit(1).execute()
+        result = await execute_async(supabase.table(REPORTS_TABLE).select("*", count="exact").limit(1))
         count = result.count if hasattr(result, 'count') else 0
         
         return {
@@ -124,33 +120,30 @@ async def health_check():
 async def get_reports(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
-    limit: int = Query(1000, ge=1, le=1000)
+    limit: int = Query(1000, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return (default: all)"),
+    supabase: Client = Depends(get_supabase)
 ):
     """Get all daily reports"""
     logger.info(f"📡 GET /api/daily-reports called with start_date={start_date}, end_date={end_date}")
     
     try:
-        if not supabase:
-            # Return sample data for testing
-            return [{
-                "id": 1,
-                "date": datetime.now().date().isoformat(),
-                "safety": "Sample safety observation",
-                "projects": "Sample project update",
-                "weekly_plan": "Sample weekly plan",
-                "daily_checks": "Sample daily checks",
-                "power_availability": "normal",
-                "dam_level": 7.5,
-                "plant_availability_percent": 95.5,
-                "call_outs": [],
-                "equipment": [],
-                "notes": "Sample notes",
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat()
-            }]
-        
         # Build query
-        query = supabase.table("daily_reports").select("*")
+        columns = "*"
+        if fields:
+            requested = [f.strip() for f in fields.split(",") if f.strip()]
+            unknown = [f for f in requested if f not in REPORT_COLUMNS]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+            if requested:
+                columns = ",".join(requested)
+        
+        cache_key = (start_date, end_date, limit, columns)
+        reports = _reports_cache.get(cache_key)
+        if reports is not None:
+            return ORJSONResponse(reports)
+        
+        query = supabase.table(REPORTS_TABLE).select(columns)
         
         if start_date:
             query = query.gte("date", start_date)
@@ -158,105 +151,93 @@ async def get_reports(
             query = query.lte("date", end_date)
         
         # Execute query
-        result = query.order("date", desc=True).limit(limit).execute()
+        result = await execute_async(query.order("date", desc=True).limit(limit))
         reports = format_supabase_response(result)
+        _reports_cache[cache_key] = reports
         
         logger.info(f"✅ Retrieved {len(reports)} reports")
         
-        # Parse JSON fields
-        for report in reports:
-            parse_json_fields(report)
-        
-        return reports
+        # Return the response directly so FastAPI skips jsonable_encoder
+        return ORJSONResponse(reports)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error in get_reports: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"❌ Error in get_reports: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching reports: {str(e)}")
 
 # POST report endpoint - CRITICAL: This was being hidden by duplicate routes
 @router.post("/")
-async def create_report(report: DailyReportCreate):
+async def create_report(
+    report: DailyReportCreate,
+    supabase: Client = Depends(get_supabase)
+):
     """Create a new daily report"""
     logger.info(f"💾 Creating report for date: {report.date}")
     
     try:
-        if not supabase:
-            # Return dummy data for testing
-            return {
-                "id": 1,
-                **report.dict(),
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat()
-            }
-        
-        # Check if report already exists
-        existing = supabase.table("daily_reports") \
-            .select("*") \
-            .eq("date", report.date) \
-            .execute()
-        
         # Prepare data
-        report_data = report.dict()
-        report_data['call_outs'] = json.dumps(report_data['call_outs'])
-        report_data['equipment'] = json.dumps(report_data['equipment'])
-        
-        now = datetime.now().isoformat()
-        
-        if existing.data:
-            # Update existing
-            report_data['updated_at'] = now
-            result = supabase.table("daily_reports") \
-                .update(report_data) \
-                .eq("date", report.date) \
-                .execute()
-        else:
-            # Create new
-            report_data['created_at'] = now
-            report_data['updated_at'] = now
-            result = supabase.table("daily_reports").insert(report_data).execute()
+        report_data = report.model_dump(mode="json")
+        
+        # One report per date: insert, or update the existing row on conflict.
+        # created_at/updated_at come from column defaults and the update trigger
+        result = await execute_async(
+            supabase.table(REPORTS_TABLE).upsert(report_data, on_conflict="date")
+        )
         
         created_data = format_supabase_response(result)
         
         if not created_data:
             raise HTTPException(status_code=500, detail="Failed to save report")
         
+        _reports_cache.clear()
         created_report = created_data[0]
-        parse_json_fields(created_report)
         
         logger.info(f"✅ Report saved successfully")
         return created_report
         
     except Exception as e:
-        logger.error(f"❌ Error in create_report: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"❌ Error in create_report: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error creating report: {str(e)}")
 
 # Stats endpoint
 @router.get("/stats/summary")
 async def get_stats_summary(
     start_date: Optional[str] = Query(None),
-    end_date: Optional[str] = Query(None)
+    end_date: Optional[str] = Query(None),
+    supabase: Client = Depends(get_supabase)
 ):
     """Get statistics summary"""
     try:
-        if not supabase:
+        # Get aggregated stats from the database
+        try:
+            stats_result = await execute_async(supabase.rpc(DAILY_REPORT_STATS_RPC, {
+                "p_start": start_date,
+                "p_end": end_date
+            }))
+            summary = stats_result.data[0] if stats_result.data else None
+        except Exception as rpc_error:
+            logger.warning(f"daily_report_stats RPC unavailable, calculating manually: {rpc_error}")
+            summary = None
+        
+        if summary:
+            total_reports = summary.get('total_reports') or 0
             return {
-                "total_reports": 1,
-                "avg_plant_availability": 95.5,
-                "total_callouts": 0,
-                "total_callout_hours": 0,
-                "avg_dam_level": 7.5
+                "total_reports": total_reports,
+                "avg_plant_availability": round(float(summary.get('avg_plant') or 0), 2),
+                "total_callouts": total_reports,  # Simplified for now
+                "total_callout_hours": round(float(summary.get('total_callout_hours') or 0), 2),
+                "avg_dam_level": round(float(summary.get('avg_dam') or 0), 2)
             }
         
-        # Get reports
-        query = supabase.table("daily_reports").select("*")
+        # Fallback: Calculate manually
+        query = supabase.table(REPORTS_TABLE).select(STATS_SELECT)
         if start_date:
             query = query.gte("date", start_date)
         if end_date:
             query = query.lte("date", end_date)
         
-        result = query.execute()
+        result = await execute_async(query)
         reports = format_supabase_response(result)
         
         if not reports:
@@ -278,17 +259,8 @@ async def get_stats_summary(
             total_plant += float(report.get('plant_availability_percent', 0))
             total_dam += float(report.get('dam_level', 0))
             
-            # Parse callouts
-            callouts = report.get('call_outs', '[]')
-            if isinstance(callouts, str):
-                try:
-                    callouts_list = json.loads(callouts)
-                except:
-                    callouts_list = []
-            else:
-                callouts_list = callouts
-            
-            total_callout_hours += sum(float(co.get('duration_hours', 0)) for co in callouts_list)
+            callouts = report.get('call_outs') or []
+            total_callout_hours += sum(float(co.get('duration_hours', 0)) for co in callouts)
         
         return {
             "total_reports": total_reports,
@@ -312,29 +284,23 @@ async def get_stats_summary(
 @router.get("/trends/plant-availability")
 async def get_plant_availability_trend(
     start_date: Optional[str] = Query(None),
-    end_date: Optional[str] = Query(None)
+    end_date: Optional[str] = Query(None),
+    supabase: Client = Depends(get_supabase)
 ):
     """Get plant availability trend"""
     try:
-        if not supabase:
-            return {
-                "dates": [datetime.now().date().isoformat()],
-                "plant_availability": [95.5],
-                "dam_levels": [7.5]
-            }
-        
         # Get reports
-        query = supabase.table("daily_reports") \
-            .select("date, plant_availability_percent, dam_level") \
+        query = supabase.table(REPORTS_TABLE) \
+            .select(PLANT_TREND_SELECT) \
             .order("date", desc=True) \
-            .limit(30)
+            .limit(TREND_WINDOW)
         
         if start_date:
             query = query.gte("date", start_date)
         if end_date:
             query = query.lte("date", end_date)
         
-        result = query.execute()
+        result = await execute_async(query)
         reports = format_supabase_response(result)
         
         if not reports:
@@ -351,11 +317,11 @@ async def get_plant_availability_trend(
             plant_availability.append(float(report.get('plant_availability_percent', 0)))
             dam_levels.append(float(report.get('dam_level', 0)))
         
-        return {
+        return ORJSONResponse({
             "dates": dates,
             "plant_availability": plant_availability,
             "dam_levels": dam_levels
-        }
+        })
         
     except Exception as e:
         logger.error(f"❌ Error in plant availability trend: {str(e)}")
@@ -364,25 +330,41 @@ async def get_plant_availability_trend(
 @router.get("/trends/equipment-performance")
 async def get_equipment_performance_trend(
     start_date: Optional[str] = Query(None),
-    end_date: Optional[str] = Query(None)
+    end_date: Optional[str] = Query(None),
+    supabase: Client = Depends(get_supabase)
 ):
     """Get equipment performance trend"""
     try:
-        if not supabase:
-            return {"equipment_data": [], "categories": []}
-        
-        # Get reports
-        query = supabase.table("daily_reports") \
-            .select("date, equipment") \
+        # Get equipment already grouped by name from the database
+        try:
+            trend_result = await execute_async(supabase.rpc(EQUIPMENT_TREND_RPC, {
+                "p_start": start_date,
+                "p_end": end_date,
+                "p_limit": TREND_WINDOW
+            }))
+            equipment_rows = trend_result.data
+        except Exception as rpc_error:
+            logger.warning(f"equipment_performance_trend RPC unavailable, grouping manually: {rpc_error}")
+            equipment_rows = None
+        
+        if equipment_rows is not None:
+            return ORJSONResponse({
+                "equipment_data": equipment_rows[:10],
+                "categories": list(dict.fromkeys(row['category'] for row in equipment_rows if row.get('category')))
+            })
+        
+        # Fallback: Group manually
+        query = supabase.table(REPORTS_TABLE) \
+            .select(EQUIPMENT_TREND_SELECT) \
             .order("date", desc=True) \
-            .limit(30)
+            .limit(TREND_WINDOW)
         
         if start_date:
             query = query.gte("date", start_date)
         if end_date:
             query = query.lte("date", end_date)
         
-        result = query.execute()
+        result = await execute_async(query)
         reports = format_supabase_response(result)
         
         if not reports:
@@ -390,19 +372,10 @@ async def get_equipment_performance_trend(
         
         # Process equipment data
         equipment_map = {}
-        categories = set()
+        categories = {}  # insertion-ordered set
         
         for report in reports:
-            equipment = report.get('equipment', '[]')
-            if isinstance(equipment, str):
-                try:
-                    equipment_list = json.loads(equipment)
-                except:
-                    equipment_list = []
-            else:
-                equipment_list = equipment
-            
-            for eq in equipment_list:
+            for eq in report.get('equipment') or []:
                 name = eq.get('name')
                 category = eq.get('category')
                 actual = eq.get('actual', 0)
@@ -411,7 +384,7 @@ async def get_equipment_performance_trend(
                     continue
                 
                 if category:
-                    categories.add(category)
+                    categories[category] = None
                 
                 if name not in equipment_map:
                     equipment_map[name] = {
@@ -424,13 +397,13 @@ async def get_equipment_performance_trend(
                 equipment_map[name]['performance_data'].append(float(actual) if actual else 0)
                 equipment_map[name]['dates'].append(report.get('date'))
         
-        equipment_data = list(equipment_map.values())
-        equipment_data.sort(key=lambda x: len(x['performance_data']), reverse=True)
+        # Only the ten most-reported pieces of equipment are returned
+        equipment_data = heapq.nlargest(10, equipment_map.values(), key=lambda x: len(x['performance_data']))
         
-        return {
-            "equipment_data": equipment_data[:10],
+        return ORJSONResponse({
+            "equipment_data": equipment_data,
             "categories": list(categories)
-        }
+        })
         
     except Exception as e:
         logger.error(f"❌ Error in equipment performance trend: {str(e)}")
@@ -438,19 +411,12 @@ async def get_equipment_performance_trend(
 
 # Delete all reports
 @router.delete("/")
-async def delete_all_reports():
+async def delete_all_reports(supabase: Client = Depends(get_supabase)):
     """Delete all reports"""
     try:
-        if not supabase:
-            return {
-                "success": True,
-                "detail": "No database connection",
-                "deleted_count": 0
-            }
-        
         # Get count before deletion
-        all_reports = supabase.table("daily_reports").select("*").execute()
-        report_count = len(all_reports.data) if all_reports.data else 0
+        count_result = await execute_async(supabase.table(REPORTS_TABLE).select("id", count="exact", head=True))
+        report_count = count_result.count or 0
         
         if report_count == 0:
             return {
@@ -460,7 +426,8 @@ async def delete_all_reports():
             }
         
         # Delete all
-        supabase.table("daily_reports").delete().neq("id", 0).execute()
+        await execute_async(supabase.table(REPORTS_TABLE).delete().neq("id", 0))
+        _reports_cache.clear()
         
         return {
             "success": True,
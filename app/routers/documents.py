@@ -1,16 +1,41 @@
 # backend/app/routers/documents.py
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from uuid import UUID, uuid4
+from collections import defaultdict, Counter
+import asyncio
 import json
-from app.supabase_client import supabase
+from cachetools import TTLCache
+from app.supabase_client import supabase, execute_async
 from app.auth import get_current_user
 from app.utils import generate_slug, format_file_size
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
+# Uploads are consumed in chunks of this size rather than read into memory at once
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Short-lived caches: (user_id, document_id) -> bool for access checks, and the folder tree
+_access_cache = TTLCache(maxsize=10_000, ttl=30)
+_tree_cache = TTLCache(maxsize=1, ttl=60)
+
+# Postgres function returning live (non-deleted) child counts for a batch of folders
+# in one GROUP BY, created by migrations/009_document_children_counts.sql
+CHILDREN_COUNTS_RPC = "document_children_counts"
+
+# Indexes backing search_documents (tags @> filter and ILIKE '%q%' on name):
+#
+#   CREATE EXTENSION IF NOT EXISTS pg_trgm;
+#   CREATE INDEX documents_tags_gin ON documents USING GIN (tags);
+#   CREATE INDEX documents_name_trgm ON documents USING GIN (name gin_trgm_ops);
+#
+# Listings skip soft-deleted rows, served by a partial index over live documents:
+#
+#   CREATE INDEX documents_parent_live ON documents (parent_id, type, name) WHERE status <> 'deleted';
+
 # --- Pydantic Models ---
 class DocumentBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
@@ -53,33 +78,40 @@ class FolderTree(BaseModel):
     children: List['FolderTree'] = []
 
 # --- Helper Functions ---
-def get_folder_tree(folder_id: Optional[UUID] = None) -> List[FolderTree]:
-    """Recursively build folder tree"""
-    query = supabase.table("documents").select("*").eq("type", "folder")
+async def get_folder_tree() -> List[Dict[str, Any]]:
+    """Build the folder tree (plain dicts shaped like FolderTree) from a single query of all folders"""
+    result = await execute_async(supabase.table("documents").select("id,name,parent_id").eq("type", "folder").neq("status", "deleted").order("name"))
     
-    if folder_id:
-        query = query.eq("parent_id", folder_id)
-    else:
-        query = query.is_("parent_id", None)
+    # Group folders by parent (rows stay name-ordered within each group)
+    children_by_parent = defaultdict(list)
+    for folder in result.data or []:
+        children_by_parent[folder['parent_id']].append(folder)
     
-    result = query.order("name").execute()
-    folders = result.data
-    
-    tree = []
-    for folder in folders:
-        children = get_folder_tree(folder['id'])
-        tree.append(FolderTree(
-            id=folder['id'],
-            name=folder['name'],
-            type='folder',
-            children=children
-        ))
+    # Walk with an explicit stack rather than recursion so deep trees cannot hit
+    # the recursion limit; seen guards against a parent_id cycle looping forever
+    tree: List[Dict[str, Any]] = []
+    stack = [(None, tree)]
+    seen = set()
+    while stack:
+        parent_id, siblings = stack.pop()
+        for folder in children_by_parent.get(parent_id, []):
+            if folder['id'] in seen:
+                continue
+            seen.add(folder['id'])
+            node = {'id': folder['id'], 'name': folder['name'], 'type': 'folder', 'children': []}
+            siblings.append(node)
+            stack.append((folder['id'], node['children']))
     
     return tree
 
-def check_access(document_id: UUID, user_id: UUID) -> bool:
-    """Check if user has access to document"""
-    doc_result = supabase.table("documents").select("access_level").eq("id", document_id).execute()
+async def check_access(document_id: UUID, user_id: UUID) -> bool:
+    """Check if user has access to document (cached for a short TTL)"""
+    key = (str(user_id), str(document_id))
+    cached = _access_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    doc_result = await execute_async(supabase.table("documents").select("access_level").eq("id", document_id))
     
     if not doc_result.data:
         return False
@@ -88,20 +120,55 @@ def check_access(document_id: UUID, user_id: UUID) -> bool:
     
     # Public access
     if document['access_level'] == 'public':
-        return True
+        allowed = True
+    else:
+        # Check permissions
+        perm_result = await execute_async(supabase.table("document_permissions").select("*").eq("document_id", document_id).eq("user_id", user_id))
+        allowed = bool(perm_result.data)
+    
+    _access_cache[key] = allowed
+    return allowed
+
+def invalidate_access(document_id: UUID, user_id: Optional[UUID] = None):
+    """Drop cached access checks for a document (for one user, or all users)"""
+    if user_id is not None:
+        _access_cache.pop((str(user_id), str(document_id)), None)
+        return
     
-    # Check permissions
-    perm_result = supabase.table("document_permissions").select("*").eq("document_id", document_id).eq("user_id", user_id).execute()
+    document_key = str(document_id)
+    for key in [k for k in list(_access_cache.keys()) if k[1] == document_key]:
+        _access_cache.pop(key, None)
+
+async def get_children_counts(parent_ids: List[str]) -> Dict[str, int]:
+    """Get the number of live (non-deleted) children for each of the given folders"""
+    if not parent_ids:
+        return {}
     
-    return bool(perm_result.data)
+    try:
+        result = await execute_async(supabase.rpc(CHILDREN_COUNTS_RPC, {"parent_ids": parent_ids}))
+        return {str(row['parent_id']): row['cnt'] for row in result.data or []}
+    except Exception:
+        # Fallback: one query for all children, counted here
+        result = await execute_async(supabase.table("documents").select("parent_id").in_("parent_id", parent_ids).neq("status", "deleted"))
+        return dict(Counter(str(row['parent_id']) for row in result.data or []))
+
+def invalidate_folder_tree():
+    """Drop the cached folder tree after folder changes"""
+    _tree_cache.clear()
 
 # --- API Routes ---
 
-@router.get("/tree", response_model=List[FolderTree])
+# The tree is built server-side from trusted rows, so it is documented with
+# FolderTree but returned directly instead of being re-validated node by node
+@router.get("/tree", responses={200: {"model": List[FolderTree]}})
 async def get_document_tree():
     """Get complete folder tree"""
     try:
-        return get_folder_tree()
+        tree = _tree_cache.get("tree")
+        if tree is None:
+            tree = await get_folder_tree()
+            _tree_cache["tree"] = tree
+        return ORJSONResponse(tree)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching document tree: {str(e)}")
 
@@ -113,14 +180,19 @@ async def get_folder_contents(
     """Get contents of a specific folder"""
     try:
         # Check access
-        if not check_access(folder_id, current_user['id']):
+        if not await check_access(folder_id, current_user['id']):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        result = supabase.table("documents").select("*, children_count").eq("parent_id", folder_id).order("type").order("name").execute()
+        result = await execute_async(supabase.table("documents").select("*").eq("parent_id", folder_id).neq("status", "deleted").order("type").order("name"))
         
         if not result.data:
             return []
         
+        # Attach child counts for all sub-folders from one grouped count
+        counts = await get_children_counts([doc['id'] for doc in result.data if doc['type'] == 'folder'])
+        for doc in result.data:
+            doc['children_count'] = counts.get(str(doc['id']), 0)
+        
         return result.data
     except HTTPException:
         raise
@@ -138,18 +210,19 @@ async def create_folder(
             raise HTTPException(status_code=400, detail="Document type must be 'folder'")
         
         # Check parent access if parent_id exists
-        if folder.parent_id and not check_access(folder.parent_id, current_user['id']):
+        if folder.parent_id and not await check_access(folder.parent_id, current_user['id']):
             raise HTTPException(status_code=403, detail="Access denied to parent folder")
         
         folder_data = folder.dict()
         folder_data['created_by'] = current_user['id']
         folder_data['id'] = str(uuid4())
         
-        result = supabase.table("documents").insert(folder_data).execute()
+        result = await execute_async(supabase.table("documents").insert(folder_data))
         
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create folder")
         
+        invalidate_folder_tree()
         return result.data[0]
     except HTTPException:
         raise
@@ -168,17 +241,19 @@ async def upload_document(
     """Upload a new document"""
     try:
         # Check parent access if parent_id exists
-        if parent_id and not check_access(parent_id, current_user['id']):
+        if parent_id and not await check_access(parent_id, current_user['id']):
             raise HTTPException(status_code=403, detail="Access denied to parent folder")
         
         # Get file extension and type
         file_extension = file.filename.split('.')[-1].lower()
         file_type = file_extension if file_extension in ['pdf', 'doc', 'docx', 'xls', 'xlsx', 'jpg', 'png', 'zip'] else 'file'
         
-        # In production: Upload to storage (S3, Supabase Storage, etc.)
+        # In production: Upload to storage (S3, Supabase Storage, etc.) by streaming
+        # file.file, e.g. supabase.storage.from_(bucket).upload(path, file.file)
         # For now, store metadata only
-        file_content = await file.read()
-        file_size = len(file_content)
+        file_size = 0
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            file_size += len(chunk)
         
         document_data = {
             'id': str(uuid4()),
@@ -198,7 +273,7 @@ async def upload_document(
         }
         
         # Insert document
-        result = supabase.table("documents").insert(document_data).execute()
+        result = await execute_async(supabase.table("documents").insert(document_data))
         
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to upload document")
@@ -214,8 +289,6 @@ async def upload_document(
             'created_by': current_user['id']
         }
         
-        supabase.table("document_versions").insert(version_data).execute()
-        
         # Log activity
         activity_data = {
             'id': str(uuid4()),
@@ -228,7 +301,11 @@ async def upload_document(
             }
         }
         
-        supabase.table("document_activities").insert(activity_data).execute()
+        # Version and activity rows only depend on the document, so write them concurrently
+        await asyncio.gather(
+            execute_async(supabase.table("document_versions").insert(version_data)),
+            execute_async(supabase.table("document_activities").insert(activity_data))
+        )
         
         return result.data[0]
     except HTTPException:
@@ -243,10 +320,10 @@ async def get_document(
 ):
     """Get document details"""
     try:
-        if not check_access(document_id, current_user['id']):
+        if not await check_access(document_id, current_user['id']):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        result = supabase.table("documents").select("*").eq("id", document_id).execute()
+        result = await execute_async(supabase.table("documents").select("*").eq("id", document_id))
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Document not found")
@@ -265,16 +342,21 @@ async def update_document(
 ):
     """Update document metadata"""
     try:
-        if not check_access(document_id, current_user['id']):
+        if not await check_access(document_id, current_user['id']):
             raise HTTPException(status_code=403, detail="Access denied")
         
         update_data = update.dict(exclude_unset=True)
         
-        result = supabase.table("documents").update(update_data).eq("id", document_id).execute()
+        result = await execute_async(supabase.table("documents").update(update_data).eq("id", document_id))
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Document not found")
         
+        if 'access_level' in update_data:
+            invalidate_access(document_id)
+        if result.data[0].get('type') == 'folder':
+            invalidate_folder_tree()
+        
         # Log activity
         activity_data = {
             'id': str(uuid4()),
@@ -284,7 +366,7 @@ async def update_document(
             'details': update_data
         }
         
-        supabase.table("document_activities").insert(activity_data).execute()
+        await execute_async(supabase.table("document_activities").insert(activity_data))
         
         return result.data[0]
     except HTTPException:
@@ -299,17 +381,21 @@ async def delete_document(
 ):
     """Soft delete a document"""
     try:
-        if not check_access(document_id, current_user['id']):
+        if not await check_access(document_id, current_user['id']):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        result = supabase.table("documents").update({
+        result = await execute_async(supabase.table("documents").update({
             'deleted_at': datetime.utcnow().isoformat(),
             'status': 'deleted'
-        }).eq("id", document_id).execute()
+        }).eq("id", document_id))
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Document not found")
         
+        invalidate_access(document_id)
+        if result.data[0].get('type') == 'folder':
+            invalidate_folder_tree()
+        
         # Log activity
         activity_data = {
             'id': str(uuid4()),
@@ -318,7 +404,7 @@ async def delete_document(
             'action': 'delete'
         }
         
-        supabase.table("document_activities").insert(activity_data).execute()
+        await execute_async(supabase.table("document_activities").insert(activity_data))
         
         return {"message": "Document deleted successfully"}
     except HTTPException:
@@ -335,7 +421,7 @@ async def search_documents(
 ):
     """Search documents"""
     try:
-        search_query = supabase.table("documents").select("*").ilike("name", f"%{query}%")
+        search_query = supabase.table("documents").select("*").neq("status", "deleted").ilike("name", f"%{query}%")
         
         if type:
             search_query = search_query.eq("type", type)
@@ -344,14 +430,25 @@ async def search_documents(
             tag_list = tags.split(',')
             search_query = search_query.contains("tags", tag_list)
         
-        result = search_query.order("updated_at", desc=True).execute()
+        result = await execute_async(search_query.order("updated_at", desc=True))
         
-        # Filter by access
-        accessible_docs = []
-        for doc in result.data or []:
-            if check_access(doc['id'], current_user['id']):
-                accessible_docs.append(doc)
+        documents = result.data or []
+        if not documents:
+            return []
         
-        return accessible_docs
+        # Filter by access: access_level is already on each row, so only the
+        # permissions of non-public documents need one batched lookup
+        restricted_ids = [doc['id'] for doc in documents if doc['access_level'] != 'public']
+        allowed = set()
+        if restricted_ids:
+            perm_result = await execute_async(
+                supabase.table("document_permissions")
+                .select("document_id")
+                .eq("user_id", current_user['id'])
+                .in_("document_id", restricted_ids)
+            )
+            allowed = {row['document_id'] for row in perm_result.data or []}
+        
+        return [doc for doc in documents if doc['access_level'] == 'public' or doc['id'] in allowed]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching documents: {str(e)}")
\ No newline at end of file
@@ -1,12 +1,23 @@
 # backend/app/routers/employees.py
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional
 from datetime import date
-from app.supabase_client import supabase
+from cachetools import TTLCache
+from app.supabase_client import supabase, execute_async, RowLoader
 import re
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Short-lived cache of the processed employee list, cleared on every write
+_list_cache = TTLCache(maxsize=4, ttl=15)
+
+# Concurrent single-employee lookups are batched into one IN query
+_employee_loader = RowLoader(supabase, "employees", "employee_id")
+
+# Columns returned by paged listings (the large list/text fields are left out)
+EMPLOYEE_LIST_COLUMNS = "employee_id,first_name,last_name,designation,department,section,date_of_engagement"
 
 class Employee(BaseModel):
     employee_id: str = Field(..., min_length=1, max_length=50, description="Unique employee ID (string)")
@@ -32,7 +43,6 @@ class Employee(BaseModel):
     previous_employer: Optional[str] = Field(None, description="Previous employer name")
 
     class Config:
-        json_encoders = {date: lambda v: v.isoformat()}
         schema_extra = {
             "example": {
                 "employee_id": "EMP1001",
@@ -72,45 +82,39 @@ class Employee(BaseModel):
             return []
         return v
 
-def process_dates_for_db(data: dict) -> dict:
-    """Convert date objects to ISO strings for Supabase"""
-    processed_data = data.copy()
-    
-    if isinstance(processed_data.get('date_of_engagement'), date):
-        processed_data['date_of_engagement'] = processed_data['date_of_engagement'].isoformat()
-    
-    if (processed_data.get('ppe_issue_date') and 
-        isinstance(processed_data['ppe_issue_date'], date)):
-        processed_data['ppe_issue_date'] = processed_data['ppe_issue_date'].isoformat()
-    
-    return processed_data
-
 def process_dates_from_db(data: dict) -> dict:
-    """Convert ISO date strings back to date objects"""
-    processed_data = data.copy()
-    
-    if processed_data.get('date_of_engagement'):
+    """Convert ISO date strings back to date objects, in place (rows are freshly fetched)"""
+    if data.get('date_of_engagement'):
         try:
-            if isinstance(processed_data['date_of_engagement'], str):
-                processed_data['date_of_engagement'] = date.fromisoformat(processed_data['date_of_engagement'])
+            if isinstance(data['date_of_engagement'], str):
+                data['date_of_engagement'] = date.fromisoformat(data['date_of_engagement'])
         except (ValueError, TypeError):
-            processed_data['date_of_engagement'] = None
+            data['date_of_engagement'] = None
     
-    if processed_data.get('ppe_issue_date'):
+    if data.get('ppe_issue_date'):
         try:
-            if isinstance(processed_data['ppe_issue_date'], str):
-                processed_data['ppe_issue_date'] = date.fromisoformat(processed_data['ppe_issue_date'])
+            if isinstance(data['ppe_issue_date'], str):
+                data['ppe_issue_date'] = date.fromisoformat(data['ppe_issue_date'])
         except (ValueError, TypeError):
-            processed_data['ppe_issue_date'] = None
+            data['ppe_issue_date'] = None
     
     array_fields = ['qualifications', 'offences', 'awards_recognition', 'other_positions']
     for field in array_fields:
-        if processed_data.get(field) is None:
-            processed_data[field] = []
-        elif not isinstance(processed_data[field], list):
-            processed_data[field] = []
+        if data.get(field) is None:
+            data[field] = []
+        elif not isinstance(data[field], list):
+            data[field] = []
     
-    return processed_data
+    return data
+
+def process_rows_for_listing(rows: list) -> list:
+    """Prepare list rows in place: dates stay ISO strings, null arrays become []"""
+    array_fields = ('qualifications', 'offences', 'awards_recognition', 'other_positions')
+    for row in rows:
+        for field in array_fields:
+            if not isinstance(row.get(field), list):
+                row[field] = []
+    return rows
 
 def get_supabase_data(response):
     """Helper to extract data from Supabase response"""
@@ -119,18 +123,34 @@ def get_supabase_data(response):
     return response
 
 # GET all employees
-@router.get("")
 @router.get("/")
-async def get_employees():
-    """Retrieve all employees from the database."""
+async def get_employees(
+    after: Optional[str] = Query(None, description="Cursor: employee_id of the last row of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to get the full list")
+):
+    """Retrieve all employees from the database, or one keyset-paginated page of summaries."""
     try:
-        response = supabase.table("employees").select("*").execute()
-        data = get_supabase_data(response)
+        if limit is not None:
+            query = supabase.table("employees").select(EMPLOYEE_LIST_COLUMNS)
+            if after:
+                query = query.gt("employee_id", after)
+            response = await execute_async(query.order("employee_id").limit(limit))
+            items = get_supabase_data(response) or []
+            return {
+                "items": items,
+                "next_cursor": items[-1]["employee_id"] if len(items) == limit else None
+            }
         
-        if not data:
-            return []
+        cached = _list_cache.get("all")
+        if cached is not None:
+            return cached
         
-        processed_employees = [process_dates_from_db(emp) for emp in data]
+        response = await execute_async(supabase.table("employees").select("*"))
+        data = get_supabase_data(response)
+        
+        # Dates are serialized back to ISO strings anyway, so list rows skip parsing
+        processed_employees = process_rows_for_listing(data) if data else []
+        _list_cache["all"] = processed_employees
         return processed_employees
     except Exception as e:
         print(f"Error fetching employees: {str(e)}")
@@ -141,13 +161,12 @@ async def get_employees():
 async def get_employee(employee_id: str):
     """Retrieve a specific employee by ID."""
     try:
-        response = supabase.table("employees").select("*").eq("employee_id", employee_id).execute()
-        data = get_supabase_data(response)
+        data = await _employee_loader.load(employee_id)
             
         if not data:
             raise HTTPException(status_code=404, detail=f"Employee with ID {employee_id} not found")
         
-        employee_data = process_dates_from_db(data[0])
+        employee_data = process_dates_from_db(data)
         return employee_data
     except HTTPException:
         raise
@@ -156,30 +175,31 @@ async def get_employee(employee_id: str):
         raise HTTPException(status_code=500, detail=f"Error fetching employee: {str(e)}")
 
 # POST create employee
-@router.post("")
 @router.post("/")
 async def create_employee(employee: Employee):
     """Create a new employee record."""
     try:
         # Check if employee_id already exists
-        existing_response = supabase.table("employees").select("employee_id").eq("employee_id", employee.employee_id).execute()
-        existing_data = get_supabase_data(existing_response)
+        existing_response = await execute_async(
+            supabase.table("employees").select("employee_id").eq("employee_id", employee.employee_id).limit(1)
+        )
             
-        if existing_data:
+        if existing_response.data:
             raise HTTPException(
                 status_code=400, 
                 detail=f"Employee with ID {employee.employee_id} already exists. Please use a different ID."
             )
         
-        data_to_insert = employee.dict()
-        data_to_insert = process_dates_for_db(data_to_insert)
+        # mode="json" emits dates as ISO strings ready for Supabase
+        data_to_insert = employee.model_dump(mode="json")
         
-        result = supabase.table("employees").insert(data_to_insert).execute()
+        result = await execute_async(supabase.table("employees").insert(data_to_insert))
         created_data = get_supabase_data(result)
             
         if not created_data:
             raise HTTPException(status_code=500, detail="No data returned after insertion")
             
+        _list_cache.pop("all", None)
         created_employee = process_dates_from_db(created_data[0])
         return created_employee
         
@@ -194,31 +214,25 @@ async def create_employee(employee: Employee):
 async def update_employee(employee_id: str, updated: Employee):
     """Update an existing employee record."""
     try:
-        # Check if employee exists
-        existing_response = supabase.table("employees").select("employee_id").eq("employee_id", employee_id).execute()
-        existing_data = get_supabase_data(existing_response)
-            
-        if not existing_data:
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Employee with ID {employee_id} not found"
-            )
-        
         if updated.employee_id != employee_id:
             raise HTTPException(
                 status_code=400,
                 detail=f"Employee ID in payload ({updated.employee_id}) does not match URL parameter ({employee_id})"
             )
         
-        data_to_update = updated.dict()
-        data_to_update = process_dates_for_db(data_to_update)
+        data_to_update = updated.model_dump(mode="json")
         
-        result = supabase.table("employees").update(data_to_update).eq("employee_id", employee_id).execute()
+        result = await execute_async(supabase.table("employees").update(data_to_update).eq("employee_id", employee_id))
         updated_data = get_supabase_data(result)
             
+        # PostgREST returns the updated rows, so an empty result means no match
         if not updated_data:
-            raise HTTPException(status_code=500, detail="No data returned after update")
+            raise HTTPException(
+                status_code=404, 
+                detail=f"Employee with ID {employee_id} not found"
+            )
             
+        _list_cache.pop("all", None)
         updated_employee = process_dates_from_db(updated_data[0])
         return updated_employee
         
@@ -233,18 +247,18 @@ async def update_employee(employee_id: str, updated: Employee):
 async def delete_employee(employee_id: str):
     """Delete an employee record."""
     try:
-        existing_response = supabase.table("employees").select("employee_id, first_name, last_name").eq("employee_id", employee_id).execute()
-        existing_data = get_supabase_data(existing_response)
+        # PostgREST returns the deleted rows, so an empty result means no match
+        result = await execute_async(supabase.table("employees").delete().eq("employee_id", employee_id))
+        deleted_data = get_supabase_data(result)
             
-        if not existing_data:
+        if not deleted_data:
             raise HTTPException(
                 status_code=404, 
                 detail=f"Employee with ID {employee_id} not found"
             )
         
-        employee_name = f"{existing_data[0].get('first_name', '')} {existing_data[0].get('last_name', '')}".strip() or 'Unknown'
-        
-        supabase.table("employees").delete().eq("employee_id", employee_id).execute()
+        _list_cache.pop("all", None)
+        employee_name = f"{deleted_data[0].get('first_name', '')} {deleted_data[0].get('last_name', '')}".strip() or 'Unknown'
             
         return {
             "success": True,
@@ -266,33 +280,26 @@ async def search_employees(
 ):
     """Search employees by various criteria"""
     try:
+        query_builder = supabase.table("employees").select("*")
         if search_by == "name":
-            response = supabase.table("employees").select("*")\
-                .or_(f"first_name.ilike.%{query}%,last_name.ilike.%{query}%")\
-                .execute()
+            query_builder = query_builder.or_(f"first_name.ilike.%{query}%,last_name.ilike.%{query}%")
         elif search_by == "id":
-            response = supabase.table("employees").select("*")\
-                .ilike("employee_id", f"%{query}%")\
-                .execute()
+            query_builder = query_builder.ilike("employee_id", f"%{query}%")
         elif search_by == "id_number":
-            response = supabase.table("employees").select("*")\
-                .ilike("id_number", f"%{query}%")\
-                .execute()
+            query_builder = query_builder.ilike("id_number", f"%{query}%")
         elif search_by == "email":
-            response = supabase.table("employees").select("*")\
-                .ilike("email", f"%{query}%")\
-                .execute()
+            query_builder = query_builder.ilike("email", f"%{query}%")
         else:
-            response = supabase.table("employees").select("*")\
-                .or_(f"first_name.ilike.%{query}%,last_name.ilike.%{query}%,employee_id.ilike.%{query}%,id_number.ilike.%{query}%")\
-                .execute()
+            query_builder = query_builder.or_(f"first_name.ilike.%{query}%,last_name.ilike.%{query}%,employee_id.ilike.%{query}%,id_number.ilike.%{query}%")
+
+        response = await execute_async(query_builder)
         
         data = get_supabase_data(response)
         
         if not data:
             return []
         
-        processed_employees = [process_dates_from_db(emp) for emp in data]
+        processed_employees = process_rows_for_listing(data)
         return processed_employees
         
     except Exception as e:
@@ -304,7 +311,7 @@ async def search_employees(
 async def employees_health():
     """Check if the employees service is operational"""
     try:
-        response = supabase.table("employees").select("employee_id").limit(1).execute()
+        response = await execute_async(supabase.table("employees").select("employee_id").limit(1))
         data = get_supabase_data(response)
         
         return {
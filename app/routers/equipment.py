@@ -1,11 +1,22 @@
 # backend/app/routers/equipment.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import date
-from app.supabase_client import supabase
+from cachetools import TTLCache
+from app.supabase_client import supabase, execute_async, RowLoader
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Short-lived cache of the processed equipment list, cleared on every write
+_list_cache = TTLCache(maxsize=4, ttl=15)
+
+# Concurrent single-item lookups are batched into one IN query
+_equipment_loader = RowLoader(supabase, "equipment", "id")
+
+# Columns returned by paged listings (notes and descriptions are left out)
+EQUIPMENT_LIST_COLUMNS = "id,equipment_id,name,category,status,location,assigned_to,next_maintenance"
 
 class Equipment(BaseModel):
     # Primary fields
@@ -40,39 +51,30 @@ class Equipment(BaseModel):
     image_url: Optional[str] = None
     notes: Optional[str] = None
 
-    class Config:
-        json_encoders = {date: lambda v: v.isoformat()}
-
-def process_dates_for_db(data: dict) -> dict:
-    """Convert date objects to ISO strings for Supabase"""
-    processed_data = data.copy()
-    
-    date_fields = ['purchase_date', 'warranty_expiry', 'last_maintenance', 'next_maintenance']
-    for field in date_fields:
-        if isinstance(processed_data.get(field), date):
-            processed_data[field] = processed_data[field].isoformat()
-    
-    return processed_data
-
 def process_dates_from_db(data: dict) -> dict:
-    """Convert ISO date strings back to date objects"""
-    processed_data = data.copy()
-    
+    """Convert ISO date strings back to date objects, in place (rows are freshly fetched)"""
     date_fields = ['purchase_date', 'warranty_expiry', 'last_maintenance', 'next_maintenance']
     for field in date_fields:
-        if processed_data.get(field):
+        if data.get(field):
             try:
-                if isinstance(processed_data[field], str):
-                    processed_data[field] = date.fromisoformat(processed_data[field])
+                if isinstance(data[field], str):
+                    data[field] = date.fromisoformat(data[field])
             except (ValueError, TypeError) as e:
                 print(f"Error parsing {field}: {e}")
-                processed_data[field] = None
+                data[field] = None
     
     # Ensure tags is always a list
-    if processed_data.get('tags') is None:
-        processed_data['tags'] = []
+    if data.get('tags') is None:
+        data['tags'] = []
     
-    return processed_data
+    return data
+
+def process_rows_for_listing(rows: list) -> list:
+    """Prepare list rows in place: dates stay ISO strings, tags defaults to []"""
+    for row in rows:
+        if row.get('tags') is None:
+            row['tags'] = []
+    return rows
 
 def get_supabase_data(response):
     """Helper to extract data from Supabase response"""
@@ -88,18 +90,34 @@ def generate_equipment_id():
 
 # --- Routes ---
 
-@router.get("")
 @router.get("/")
-async def get_equipment():
-    """Retrieve all equipment from the database."""
+async def get_equipment(
+    after_id: int = Query(0, ge=0, description="Cursor: id of the last row of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to get the full list")
+):
+    """Retrieve all equipment from the database, or one keyset-paginated page of summaries."""
     try:
-        response = supabase.table("equipment").select("*").execute()
-        data = get_supabase_data(response)
+        if limit is not None:
+            response = await execute_async(
+                supabase.table("equipment").select(EQUIPMENT_LIST_COLUMNS)
+                .gt("id", after_id).order("id").limit(limit)
+            )
+            items = get_supabase_data(response) or []
+            return {
+                "items": items,
+                "next_cursor": items[-1]["id"] if len(items) == limit else None
+            }
         
-        if not data:
-            return []
+        cached = _list_cache.get("all")
+        if cached is not None:
+            return cached
         
-        processed_equipment = [process_dates_from_db(item) for item in data]
+        response = await execute_async(supabase.table("equipment").select("*"))
+        data = get_supabase_data(response)
+        
+        # Dates are serialized back to ISO strings anyway, so list rows skip parsing
+        processed_equipment = process_rows_for_listing(data) if data else []
+        _list_cache["all"] = processed_equipment
         return processed_equipment
     except Exception as e:
         print(f"Error fetching equipment: {str(e)}")
@@ -109,13 +127,12 @@ async def get_equipment():
 async def get_equipment_item(equipment_id: int):
     """Retrieve a specific equipment item by ID."""
     try:
-        response = supabase.table("equipment").select("*").eq("id", equipment_id).execute()
-        data = get_supabase_data(response)
+        data = await _equipment_loader.load(equipment_id)
             
         if not data:
             raise HTTPException(status_code=404, detail=f"Equipment with ID {equipment_id} not found")
         
-        equipment_data = process_dates_from_db(data[0])
+        equipment_data = process_dates_from_db(data)
         return equipment_data
     except HTTPException:
         raise
@@ -123,27 +140,26 @@ async def get_equipment_item(equipment_id: int):
         print(f"Error fetching equipment {equipment_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching equipment: {str(e)}")
 
-@router.post("")
 @router.post("/")
 async def create_equipment(equipment: Equipment):
     """Create a new equipment record."""
     try:
-        data_to_insert = equipment.dict(exclude_none=True)
+        # mode="json" emits dates as ISO strings ready for Supabase
+        data_to_insert = equipment.model_dump(mode="json", exclude_none=True)
         
         # Auto-generate equipment_id if not provided
         if not data_to_insert.get('equipment_id'):
             data_to_insert['equipment_id'] = generate_equipment_id()
         
-        data_to_insert = process_dates_for_db(data_to_insert)
-        
         print(f"Inserting equipment data: {data_to_insert}")  # Debug log
         
-        result = supabase.table("equipment").insert(data_to_insert).execute()
+        result = await execute_async(supabase.table("equipment").insert(data_to_insert))
         created_data = get_supabase_data(result)
             
         if not created_data:
             raise HTTPException(status_code=500, detail="No data returned after insertion")
             
+        _list_cache.pop("all", None)
         created_equipment = process_dates_from_db(created_data[0])
         return created_equipment
         
@@ -161,28 +177,23 @@ async def create_equipment(equipment: Equipment):
 async def update_equipment(equipment_id: int, updated: Equipment):
     """Update an existing equipment record."""
     try:
-        existing_response = supabase.table("equipment").select("id").eq("id", equipment_id).execute()
-        existing_data = get_supabase_data(existing_response)
-            
-        if not existing_data:
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Equipment with ID {equipment_id} not found"
-            )
-        
-        data_to_update = updated.dict(exclude_none=True)
-        data_to_update = process_dates_for_db(data_to_update)
+        data_to_update = updated.model_dump(mode="json", exclude_none=True)
         
         # Don't update equipment_id if it already exists
         if 'equipment_id' in data_to_update and not data_to_update['equipment_id']:
             data_to_update.pop('equipment_id')
         
-        result = supabase.table("equipment").update(data_to_update).eq("id", equipment_id).execute()
+        result = await execute_async(supabase.table("equipment").update(data_to_update).eq("id", equipment_id))
         updated_data = get_supabase_data(result)
             
+        # PostgREST returns the updated rows, so an empty result means no match
         if not updated_data:
-            raise HTTPException(status_code=500, detail="No data returned after update")
+            raise HTTPException(
+                status_code=404, 
+                detail=f"Equipment with ID {equipment_id} not found"
+            )
             
+        _list_cache.pop("all", None)
         updated_equipment = process_dates_from_db(updated_data[0])
         return updated_equipment
         
@@ -196,18 +207,18 @@ async def update_equipment(equipment_id: int, updated: Equipment):
 async def delete_equipment(equipment_id: int):
     """Delete an equipment record."""
     try:
-        existing_response = supabase.table("equipment").select("id, name").eq("id", equipment_id).execute()
-        existing_data = get_supabase_data(existing_response)
+        # PostgREST returns the deleted rows, so an empty result means no match
+        result = await execute_async(supabase.table("equipment").delete().eq("id", equipment_id))
+        deleted_data = get_supabase_data(result)
             
-        if not existing_data:
+        if not deleted_data:
             raise HTTPException(
                 status_code=404, 
                 detail=f"Equipment with ID {equipment_id} not found"
             )
         
-        equipment_name = existing_data[0].get('name', 'Unknown')
-        
-        supabase.table("equipment").delete().eq("id", equipment_id).execute()
+        _list_cache.pop("all", None)
+        equipment_name = deleted_data[0].get('name', 'Unknown')
             
         return {
             "success": True,
@@ -225,7 +236,7 @@ async def delete_equipment(equipment_id: int):
 async def equipment_health():
     """Check if the equipment service is operational"""
     try:
-        response = supabase.table("equipment").select("id").limit(1).execute()
+        response = await execute_async(supabase.table("equipment").select("id").limit(1))
         data = get_supabase_data(response)
         
         return {
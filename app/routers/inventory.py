@@ -1,10 +1,14 @@
 # backend/app/routers/inventory.py
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Set
 from datetime import datetime, timedelta
+from collections import defaultdict
+import itertools
+import re
 
-router = APIRouter(prefix="/api/inventory", tags=["inventory"])
+router = APIRouter(prefix="/api/inventory", tags=["inventory"], default_response_class=ORJSONResponse)
 
 # Pydantic models
 class InventoryItem(BaseModel):
@@ -52,8 +56,128 @@ class InventoryItemUpdate(BaseModel):
     location: Optional[str] = None
 
 # Mock database
+# Handlers touching inventory_db and its indexes stay async def without awaiting:
+# each then runs start to finish on the event loop, so reads never see a
+# half-applied update and no locking is needed (the work is microseconds)
 inventory_db = {}
 
+# ---------- Search index ----------
+SEARCH_FIELDS = ("name", "sku", "description")
+_TOKEN_RE = re.compile(r"\w+")
+
+class TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "TrieNode"] = {}
+        self.ids: Set[str] = set()
+
+class SuffixTrie:
+    """Maps every substring of the indexed tokens to the ids of the items containing it.
+
+    Each suffix of each lowercased token is inserted, so walking a query token from
+    the root lands on the node holding every item with that token as a substring.
+    """
+
+    def __init__(self):
+        self.root = TrieNode()
+
+    @staticmethod
+    def _tokens(texts: Iterable[str]) -> Set[str]:
+        return {token for text in texts for token in _TOKEN_RE.findall(text.lower())}
+
+    def add(self, item_id: str, texts: Iterable[str]):
+        for token in self._tokens(texts):
+            for start in range(len(token)):
+                node = self.root
+                for ch in token[start:]:
+                    node = node.children.setdefault(ch, TrieNode())
+                    node.ids.add(item_id)
+
+    def remove(self, item_id: str, texts: Iterable[str]):
+        for token in self._tokens(texts):
+            for start in range(len(token)):
+                parent = self.root
+                for ch in token[start:]:
+                    node = parent.children.get(ch)
+                    if node is None:
+                        break
+                    node.ids.discard(item_id)
+                    # A child's ids are a subset of its parent's, so an empty node
+                    # means the whole subtree is empty
+                    if not node.ids:
+                        del parent.children[ch]
+                        break
+                    parent = node
+
+    def lookup(self, token: str) -> Set[str]:
+        """Ids of items with token as a substring of one of their tokens (do not mutate)"""
+        node = self.root
+        for ch in token:
+            node = node.children.get(ch)
+            if node is None:
+                return set()
+        return node.ids
+
+search_index = SuffixTrie()
+
+# Lowercased search fields joined by NUL, so one `in` checks all three fields
+# without letting a query match across a field boundary
+_search_text: Dict[str, str] = {}
+
+def index_search(item: dict):
+    texts = [item[field] for field in SEARCH_FIELDS]
+    search_index.add(item["id"], texts)
+    _search_text[item["id"]] = "\0".join(text.lower() for text in texts)
+
+def unindex_search(item: dict):
+    search_index.remove(item["id"], (item[field] for field in SEARCH_FIELDS))
+    _search_text.pop(item["id"], None)
+
+# ---------- Filter indexes ----------
+# field -> value -> ids, for the exact-match filters of get_inventory_items
+FILTER_FIELDS = ("category", "status", "supplier")
+filter_index: Dict[str, Dict[str, Set[str]]] = {field: defaultdict(set) for field in FILTER_FIELDS}
+
+# Running sum of currentStock * cost, kept alongside the filter indexes for /stats.
+# _item_values remembers what each item contributed, so unindexing subtracts exactly
+# what indexing added even if the item's fields changed in between.
+inventory_totals = {"value": 0.0}
+_item_values: Dict[str, float] = {}
+
+# Insertion position of each item, so id sets can be listed in inventory_db order
+_positions: Dict[str, int] = {}
+_next_position = itertools.count()
+
+def index_filters(item: dict):
+    for field in FILTER_FIELDS:
+        filter_index[field][item[field]].add(item["id"])
+    value = item["currentStock"] * item["cost"]
+    _item_values[item["id"]] = value
+    inventory_totals["value"] += value
+
+def unindex_filters(item: dict):
+    inventory_totals["value"] -= _item_values.pop(item["id"], 0.0)
+    if not _item_values:
+        # Nothing left to sum; drop any accumulated float error
+        inventory_totals["value"] = 0.0
+    for field in FILTER_FIELDS:
+        ids = filter_index[field].get(item[field])
+        if ids is not None:
+            ids.discard(item["id"])
+            if not ids:
+                del filter_index[field][item[field]]
+
+def index_item(item: dict):
+    _positions.setdefault(item["id"], next(_next_position))
+    index_filters(item)
+    index_search(item)
+
+def unindex_item(item: dict):
+    _positions.pop(item["id"], None)
+    unindex_filters(item)
+    unindex_search(item)
+
 def calculate_status(current_stock: int, min_stock: int) -> str:
     if current_stock == 0:
         return "out-of-stock"
@@ -64,6 +188,8 @@ def calculate_status(current_stock: int, min_stock: int) -> str:
 
 # Initialize with sample data
 def init_sample_data():
+    # One clock read so every sample timestamp is relative to the same instant
+    now = datetime.now()
     sample_items = [
         {
             "id": "inv-001",
@@ -79,9 +205,9 @@ def init_sample_data():
             "supplier": "TechSupply Inc",
             "location": "Shelf A-12",
             "status": "in-stock",
-            "lastRestocked": (datetime.now() - timedelta(days=7)).isoformat(),
-            "createdAt": (datetime.now() - timedelta(days=30)).isoformat(),
-            "updatedAt": (datetime.now() - timedelta(days=7)).isoformat()
+            "lastRestocked": (now - timedelta(days=7)).isoformat(),
+            "createdAt": (now - timedelta(days=30)).isoformat(),
+            "updatedAt": (now - timedelta(days=7)).isoformat()
         },
         {
             "id": "inv-002",
@@ -97,9 +223,9 @@ def init_sample_data():
             "supplier": "SafetyFirst Ltd",
             "location": "Bin C-08",
             "status": "low-stock",
-            "lastRestocked": (datetime.now() - timedelta(days=14)).isoformat(),
-            "createdAt": (datetime.now() - timedelta(days=45)).isoformat(),
-            "updatedAt": (datetime.now() - timedelta(days=14)).isoformat()
+            "lastRestocked": (now - timedelta(days=14)).isoformat(),
+            "createdAt": (now - timedelta(days=45)).isoformat(),
+            "updatedAt": (now - timedelta(days=14)).isoformat()
         },
         {
             "id": "inv-003",
@@ -115,9 +241,9 @@ def init_sample_data():
             "supplier": "Industrial Parts Co",
             "location": "Drum Storage",
             "status": "in-stock",
-            "lastRestocked": (datetime.now() - timedelta(days=3)).isoformat(),
-            "createdAt": (datetime.now() - timedelta(days=60)).isoformat(),
-            "updatedAt": (datetime.now() - timedelta(days=3)).isoformat()
+            "lastRestocked": (now - timedelta(days=3)).isoformat(),
+            "createdAt": (now - timedelta(days=60)).isoformat(),
+            "updatedAt": (now - timedelta(days=3)).isoformat()
         },
         {
             "id": "inv-004",
@@ -133,9 +259,9 @@ def init_sample_data():
             "supplier": "Global Tools",
             "location": "Tool Crib B",
             "status": "out-of-stock",
-            "lastRestocked": (datetime.now() - timedelta(days=30)).isoformat(),
-            "createdAt": (datetime.now() - timedelta(days=90)).isoformat(),
-            "updatedAt": (datetime.now() - timedelta(days=30)).isoformat()
+            "lastRestocked": (now - timedelta(days=30)).isoformat(),
+            "createdAt": (now - timedelta(days=90)).isoformat(),
+            "updatedAt": (now - timedelta(days=30)).isoformat()
         },
         {
             "id": "inv-005",
@@ -151,19 +277,25 @@ def init_sample_data():
             "supplier": "Office Depot",
             "location": "Supply Closet",
             "status": "low-stock",
-            "lastRestocked": (datetime.now() - timedelta(days=21)).isoformat(),
-            "createdAt": (datetime.now() - timedelta(days=120)).isoformat(),
-            "updatedAt": (datetime.now() - timedelta(days=21)).isoformat()
+            "lastRestocked": (now - timedelta(days=21)).isoformat(),
+            "createdAt": (now - timedelta(days=120)).isoformat(),
+            "updatedAt": (now - timedelta(days=21)).isoformat()
         }
     ]
     
     for item in sample_items:
         inventory_db[item["id"]] = item
+        index_item(item)
 
 # Initialize sample data
 init_sample_data()
 
-@router.get("/items", response_model=List[InventoryItem])
+# Ids are never reused: len(inventory_db) + 1 collided with a live item after a delete
+_item_seq = itertools.count(len(inventory_db) + 1)
+
+# Stored items are built from validated payloads, so the GET handlers document the
+# schema but return the dicts directly instead of re-validating them per request
+@router.get("/items", responses={200: {"model": List[InventoryItem]}})
 async def get_inventory_items(
     category: Optional[str] = None,
     status: Optional[str] = None,
@@ -171,27 +303,30 @@ async def get_inventory_items(
     search: Optional[str] = None
 ):
     """Get all inventory items with optional filtering"""
-    items = list(inventory_db.values())
+    # Intersect the id sets of every indexed filter, then materialize only those items
+    postings = [
+        filter_index[field].get(value, set())
+        for field, value in (("category", category), ("status", status), ("supplier", supplier))
+        if value
+    ]
+    search_lower = search.lower() if search else None
+    if search_lower:
+        # Every word token of the query is a substring of some token of a matching
+        # field, so the trie narrows the candidates before the exact substring check
+        postings.extend(search_index.lookup(token) for token in _TOKEN_RE.findall(search_lower))
     
-    # Apply filters
-    if category:
-        items = [item for item in items if item["category"] == category]
-    if status:
-        items = [item for item in items if item["status"] == status]
-    if supplier:
-        items = [item for item in items if item["supplier"] == supplier]
-    if search:
-        search_lower = search.lower()
-        items = [
-            item for item in items 
-            if search_lower in item["name"].lower() 
-            or search_lower in item["sku"].lower()
-            or search_lower in item["description"].lower()
-        ]
+    ids = sorted(set.intersection(*postings), key=_positions.__getitem__) if postings else inventory_db
     
-    return items
+    # One pass, one list: the exact search check is a single `in` on the precomputed text
+    items = [
+        inventory_db[item_id] for item_id in ids
+        if not search_lower or search_lower in _search_text[item_id]
+    ]
+    
+    # Return the response directly so FastAPI skips jsonable_encoder
+    return ORJSONResponse(items)
 
-@router.get("/items/{item_id}", response_model=InventoryItem)
+@router.get("/items/{item_id}", responses={200: {"model": InventoryItem}})
 async def get_inventory_item(item_id: str):
     """Get a specific inventory item by ID"""
     if item_id not in inventory_db:
@@ -201,31 +336,22 @@ async def get_inventory_item(item_id: str):
 @router.post("/items", response_model=InventoryItem)
 async def create_inventory_item(item: InventoryItemCreate):
     """Create a new inventory item"""
-    item_id = f"inv-{len(inventory_db) + 1:03d}"
+    item_id = f"inv-{next(_item_seq):03d}"
     now = datetime.now().isoformat()
     
     status = calculate_status(item.currentStock, item.minStock)
     
-    new_item = InventoryItem(
-        id=item_id,
-        name=item.name,
-        sku=item.sku,
-        category=item.category,
-        description=item.description,
-        currentStock=item.currentStock,
-        minStock=item.minStock,
-        maxStock=item.maxStock,
-        unit=item.unit,
-        cost=item.cost,
-        supplier=item.supplier,
-        location=item.location,
-        status=status,
-        lastRestocked=now if item.currentStock > 0 else (datetime.now() - timedelta(days=30)).isoformat(),
-        createdAt=now,
-        updatedAt=now
-    )
+    new_item = {
+        "id": item_id,
+        **item.model_dump(),
+        "status": status,
+        "lastRestocked": now if item.currentStock > 0 else (datetime.now() - timedelta(days=30)).isoformat(),
+        "createdAt": now,
+        "updatedAt": now
+    }
     
-    inventory_db[item_id] = new_item.dict()
+    inventory_db[item_id] = new_item
+    index_item(new_item)
     return new_item
 
 @router.put("/items/{item_id}", response_model=InventoryItem)
@@ -235,24 +361,31 @@ async def update_inventory_item(item_id: str, item_update: InventoryItemUpdate):
         raise HTTPException(status_code=404, detail="Inventory item not found")
     
     existing_item = inventory_db[item_id]
-    update_data = item_update.dict(exclude_unset=True)
+    # Explicit nulls leave the field unchanged
+    update_data = {field: value for field, value in item_update.model_dump(exclude_unset=True).items() if value is not None}
     
-    # Update fields
-    for field, value in update_data.items():
-        if value is not None:
-            existing_item[field] = value
+    # Build the updated item first, so a failure leaves the stored item and its indexes untouched
+    updated_item = {**existing_item, **update_data}
     
     # Recalculate status if stock changed
     if 'currentStock' in update_data:
-        existing_item['status'] = calculate_status(
-            existing_item['currentStock'], 
-            existing_item['minStock']
+        updated_item['status'] = calculate_status(
+            updated_item['currentStock'], 
+            updated_item['minStock']
         )
-        if update_data['currentStock'] > existing_item.get('previous_stock', existing_item['currentStock']):
-            existing_item['lastRestocked'] = datetime.now().isoformat()
+        if update_data['currentStock'] > existing_item.get('previous_stock', updated_item['currentStock']):
+            updated_item['lastRestocked'] = datetime.now().isoformat()
+    
+    updated_item['updatedAt'] = datetime.now().isoformat()
     
-    existing_item['updatedAt'] = datetime.now().isoformat()
-    inventory_db[item_id] = existing_item
+    reindex_search = any(field in update_data for field in SEARCH_FIELDS)
+    if reindex_search:
+        unindex_search(existing_item)
+    unindex_filters(existing_item)
+    existing_item.update(updated_item)
+    index_filters(existing_item)
+    if reindex_search:
+        index_search(existing_item)
     
     return existing_item
 
@@ -262,7 +395,7 @@ async def delete_inventory_item(item_id: str):
     if item_id not in inventory_db:
         raise HTTPException(status_code=404, detail="Inventory item not found")
     
-    del inventory_db[item_id]
+    unindex_item(inventory_db.pop(item_id))
     return {"message": "Inventory item deleted successfully"}
 
 @router.post("/items/{item_id}/restock")
@@ -275,8 +408,10 @@ async def restock_item(item_id: str, quantity: int):
         raise HTTPException(status_code=400, detail="Quantity must be positive")
     
     item = inventory_db[item_id]
+    unindex_filters(item)
     item['currentStock'] += quantity
     item['status'] = calculate_status(item['currentStock'], item['minStock'])
+    index_filters(item)
     item['lastRestocked'] = datetime.now().isoformat()
     item['updatedAt'] = datetime.now().isoformat()
     
@@ -290,40 +425,26 @@ async def restock_item(item_id: str, quantity: int):
 @router.get("/stats")
 async def get_inventory_stats():
     """Get inventory statistics for dashboard"""
-    items = list(inventory_db.values())
-    
-    total_items = len(items)
-    low_stock = len([item for item in items if item['status'] == 'low-stock'])
-    out_of_stock = len([item for item in items if item['status'] == 'out-of-stock'])
-    total_value = sum(item['currentStock'] * item['cost'] for item in items)
-    
-    # Calculate category distribution
-    categories = {}
-    for item in items:
-        category = item['category']
-        if category not in categories:
-            categories[category] = 0
-        categories[category] += 1
-    
+    # Everything is read from the indexes maintained on write, so no item is visited
+    status_index = filter_index["status"]
     return {
-        "totalItems": total_items,
-        "lowStock": low_stock,
-        "outOfStock": out_of_stock,
-        "totalValue": round(total_value, 2),
-        "categoryDistribution": categories
+        "totalItems": len(inventory_db),
+        "lowStock": len(status_index.get("low-stock", ())),
+        "outOfStock": len(status_index.get("out-of-stock", ())),
+        "totalValue": round(inventory_totals["value"], 2),
+        "categoryDistribution": {category: len(ids) for category, ids in filter_index["category"].items()}
     }
 
 @router.get("/categories")
 async def get_categories():
     """Get all inventory categories"""
-    categories = set(item['category'] for item in inventory_db.values())
-    return {"categories": sorted(list(categories))}
+    # Index keys are exactly the categories in use (empty buckets are dropped)
+    return {"categories": sorted(filter_index["category"])}
 
 @router.get("/suppliers")
 async def get_suppliers():
     """Get all suppliers"""
-    suppliers = set(item['supplier'] for item in inventory_db.values())
-    return {"suppliers": sorted(list(suppliers))}
+    return {"suppliers": sorted(filter_index["supplier"])}
 
 @router.get("/low-stock")
 async def get_low_stock_items():
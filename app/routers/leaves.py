@@ -1,15 +1,26 @@
 # leaves.py – simplified, no department/manager, with error logging
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, validator
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from typing import Optional, List
 from datetime import date, datetime
-from app.supabase_client import supabase
+from cachetools import TTLCache
+from app.supabase_client import supabase, execute_async
+import asyncio
 import logging
 import traceback
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Postgres function backing get_leave_stats (all six counts in one round trip),
+# created with its index by migrations/007_leave_stats.sql
+LEAVE_STATS_RPC = "leave_stats"
+STATS_KEYS = ("total", "pending", "approved", "rejected", "on_leave_now", "upcoming")
+
+# Short-lived cache of the stats summary, cleared on every write
+_stats_cache = TTLCache(maxsize=1, ttl=30)
 
 # ---------- Models ----------
 class LeaveCreate(BaseModel):
@@ -25,11 +36,11 @@ class LeaveCreate(BaseModel):
     handover_to: Optional[str] = None
     notes: Optional[str] = None
 
-    @validator('end_date')
-    def end_date_after_start_date(cls, v, values):
-        if 'start_date' in values and v < values['start_date']:
+    @model_validator(mode="after")
+    def end_date_after_start_date(self):
+        if self.end_date < self.start_date:
             raise ValueError('End date must be after start date')
-        return v
+        return self
 
 class LeaveUpdate(BaseModel):
     leave_type: Optional[str] = None
@@ -41,11 +52,11 @@ class LeaveUpdate(BaseModel):
     status: Optional[str] = None
     notes: Optional[str] = None
 
-    @validator('end_date')
-    def end_date_after_start_date(cls, v, values):
-        if v is not None and values.get('start_date') is not None and v < values['start_date']:
+    @model_validator(mode="after")
+    def end_date_after_start_date(self):
+        if self.start_date is not None and self.end_date is not None and self.end_date < self.start_date:
             raise ValueError('End date must be after start date')
-        return v
+        return self
 
 class LeaveResponse(BaseModel):
     id: int
@@ -65,17 +76,24 @@ class LeaveResponse(BaseModel):
     updated_at: Optional[datetime]
     notes: Optional[str]
 
-    class Config:
-        from_attributes = True
-        json_encoders = {
-            date: lambda v: v.isoformat(),
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(from_attributes=True)
 
-# ---------- Helper ----------
-def calculate_total_days(start_date: date, end_date: date) -> int:
-    return (end_date - start_date).days + 1
+# Indexes backing get_leaves (newest-first listing and the pending filter):
+#
+#   CREATE INDEX IF NOT EXISTS leaves_applied_date_desc ON leaves (applied_date DESC, id DESC);
+#   CREATE INDEX IF NOT EXISTS leaves_pending_applied ON leaves (applied_date DESC, id DESC) WHERE status = 'pending';
 
+# Columns the responses actually carry (LeaveResponse trims anything else anyway)
+LEAVE_COLUMNS = ",".join(LeaveResponse.model_fields)
+
+# total_days is derived by Postgres, so it can never drift from the dates and is
+# not sent on insert/update (migrations/001_leaves_generated_total_days.sql must be
+# applied before this code is deployed)
+#
+# applied_date is stamped by Postgres on insert as well
+# (migrations/002_leaves_applied_date_default.sql, also applied before deploying)
+
+# ---------- Helper ----------
 def get_supabase_data(response):
     if hasattr(response, 'data'):
         return response.data
@@ -86,48 +104,42 @@ def get_supabase_data(response):
 @router.post("/", response_model=LeaveResponse)
 async def create_leave(leave: LeaveCreate):
     try:
-        total_days = calculate_total_days(leave.start_date, leave.end_date)
-
-        data_to_insert = {
-            "employee_id": leave.employee_id,
-            "employee_name": leave.employee_name,
-            "position": leave.position,
-            "contact_number": leave.contact_number,
-            "leave_type": leave.leave_type,
-            "start_date": leave.start_date.isoformat(),
-            "end_date": leave.end_date.isoformat(),
-            "total_days": total_days,
-            "reason": leave.reason,
-            "emergency_contact": leave.emergency_contact,
-            "handover_to": leave.handover_to,
-            "notes": leave.notes,
-            "status": "pending",
-            "applied_date": datetime.utcnow().isoformat(),
-        }
+        data_to_insert = {**leave.model_dump(mode="json"), "status": "pending"}
 
-        result = supabase.table("leaves").insert(data_to_insert).execute()
+        result = await execute_async(supabase.table("leaves").insert(data_to_insert))
         created = get_supabase_data(result)
         if not created:
             raise HTTPException(status_code=500, detail="No data returned after insertion")
+        _stats_cache.clear()
         return created[0]
     except Exception as e:
         logger.error(f"Error creating leave: {str(e)}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Error creating leave: {str(e)}")
 
 # ---------- GET all leaves ----------
-@router.get("", response_model=List[LeaveResponse])
-@router.get("/", response_model=List[LeaveResponse])
-async def get_leaves(status: Optional[str] = None, leave_type: Optional[str] = None):
+@router.get("", responses={200: {"model": List[LeaveResponse]}})
+@router.get("/", responses={200: {"model": List[LeaveResponse]}})
+async def get_leaves(
+    status: Optional[str] = None,
+    leave_type: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; omit to get every leave")
+):
     try:
-        query = supabase.table("leaves").select("*")
+        query = supabase.table("leaves").select(LEAVE_COLUMNS)
         if status:
             query = query.eq("status", status)
         if leave_type:
             query = query.eq("leave_type", leave_type)
-        query = query.order("applied_date", desc=True)
-        response = query.execute()
+        # id breaks applied_date ties so range() pages neither repeat nor skip rows
+        query = query.order("applied_date", desc=True).order("id", desc=True)
+        if limit is not None:
+            query = query.range(skip, skip + limit - 1)
+        response = await execute_async(query)
         data = get_supabase_data(response)
-        return data or []
+        # Rows are already JSON-shaped and projected onto LeaveResponse's columns,
+        # so return them directly and let FastAPI skip validation and jsonable_encoder
+        return ORJSONResponse(data or [])
     except Exception as e:
         logger.error(f"Error fetching leaves: {str(e)}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Error fetching leaves: {str(e)}")
@@ -136,23 +148,44 @@ async def get_leaves(status: Optional[str] = None, leave_type: Optional[str] = N
 @router.get("/stats/summary")
 async def get_leave_stats():
     try:
-        response = supabase.table("leaves").select("*").execute()
-        data = get_supabase_data(response) or []
+        cached = _stats_cache.get("stats")
+        if cached is not None:
+            return cached
+
+        try:
+            stats_result = await execute_async(supabase.rpc(LEAVE_STATS_RPC, {}))
+            summary = stats_result.data
+            if isinstance(summary, list):
+                summary = summary[0] if summary else None
+        except Exception as rpc_error:
+            logger.warning(f"leave_stats RPC unavailable, counting with queries: {rpc_error}")
+            summary = None
+
+        if summary:
+            stats = {key: summary.get(key) or 0 for key in STATS_KEYS}
+            _stats_cache["stats"] = stats
+            return stats
+
+        # Fallback: one count-only query per figure
         today = date.today().isoformat()
-        total = len(data)
-        pending = sum(1 for l in data if l.get('status') == 'pending')
-        approved = sum(1 for l in data if l.get('status') == 'approved')
-        rejected = sum(1 for l in data if l.get('status') == 'rejected')
-        on_leave_now = sum(1 for l in data if l.get('status') == 'approved' and l.get('start_date') <= today <= l.get('end_date'))
-        upcoming = sum(1 for l in data if l.get('status') == 'approved' and l.get('start_date') > today)
-        return {
-            "total": total,
-            "pending": pending,
-            "approved": approved,
-            "rejected": rejected,
-            "on_leave_now": on_leave_now,
-            "upcoming": upcoming
+
+        def count_leaves():
+            # HEAD request: Postgres counts the rows and no row data is sent back
+            return supabase.table("leaves").select("id", count="exact", head=True)
+
+        queries = {
+            "total": count_leaves(),
+            "pending": count_leaves().eq("status", "pending"),
+            "approved": count_leaves().eq("status", "approved"),
+            "rejected": count_leaves().eq("status", "rejected"),
+            "on_leave_now": count_leaves().eq("status", "approved").lte("start_date", today).gte("end_date", today),
+            "upcoming": count_leaves().eq("status", "approved").gt("start_date", today),
         }
+        # Run the counts concurrently so the latency is the slowest query, not the sum
+        results = await asyncio.gather(*(execute_async(query) for query in queries.values()))
+        stats = {key: result.count or 0 for key, result in zip(queries, results)}
+        _stats_cache["stats"] = stats
+        return stats
     except Exception as e:
         logger.error(f"Error fetching stats: {str(e)}\n{traceback.format_exc()}")
         return {"total": 0, "pending": 0, "approved": 0, "rejected": 0, "on_leave_now": 0, "upcoming": 0}
@@ -161,7 +194,7 @@ async def get_leave_stats():
 @router.get("/{leave_id}", response_model=LeaveResponse)
 async def get_leave(leave_id: int):
     try:
-        resp = supabase.table("leaves").select("*").eq("id", leave_id).execute()
+        resp = await execute_async(supabase.table("leaves").select(LEAVE_COLUMNS).eq("id", leave_id))
         data = get_supabase_data(resp)
         if not data:
             raise HTTPException(status_code=404, detail="Leave not found")
@@ -174,36 +207,24 @@ async def get_leave(leave_id: int):
 @router.patch("/{leave_id}", response_model=LeaveResponse)
 async def update_leave(leave_id: int, updated: LeaveUpdate):
     try:
-        existing_resp = supabase.table("leaves").select("*").eq("id", leave_id).execute()
-        existing = get_supabase_data(existing_resp)
-        if not existing:
-            raise HTTPException(status_code=404, detail=f"Leave with ID {leave_id} not found")
-
-        data_to_update = updated.dict(exclude_unset=True)
-
-        if 'start_date' in data_to_update or 'end_date' in data_to_update:
-            current = existing[0]
-            start = data_to_update.get('start_date', date.fromisoformat(current['start_date']))
-            end = data_to_update.get('end_date', date.fromisoformat(current['end_date']))
-            data_to_update['total_days'] = calculate_total_days(start, end)
-
-        if 'start_date' in data_to_update and isinstance(data_to_update['start_date'], date):
-            data_to_update['start_date'] = data_to_update['start_date'].isoformat()
-        if 'end_date' in data_to_update and isinstance(data_to_update['end_date'], date):
-            data_to_update['end_date'] = data_to_update['end_date'].isoformat()
+        data_to_update = updated.model_dump(mode="json", exclude_unset=True)
 
         if not data_to_update:
+            resp = await execute_async(supabase.table("leaves").select(LEAVE_COLUMNS).eq("id", leave_id))
+            existing = get_supabase_data(resp)
+            if not existing:
+                raise HTTPException(status_code=404, detail=f"Leave with ID {leave_id} not found")
             return existing[0]
 
-        result = supabase.table("leaves").update(data_to_update).eq("id", leave_id).execute()
+        # PostgREST returns the updated row, so an empty result means no match
+        result = await execute_async(supabase.table("leaves").update(data_to_update).eq("id", leave_id))
         updated_data = get_supabase_data(result)
         if not updated_data:
-            fetch_resp = supabase.table("leaves").select("*").eq("id", leave_id).execute()
-            fetched = get_supabase_data(fetch_resp)
-            if not fetched:
-                raise HTTPException(status_code=500, detail="No data returned after update")
-            return fetched[0]
+            raise HTTPException(status_code=404, detail=f"Leave with ID {leave_id} not found")
+        _stats_cache.clear()
         return updated_data[0]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating leave {leave_id}: {str(e)}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Error updating leave: {str(e)}")
@@ -212,11 +233,14 @@ async def update_leave(leave_id: int, updated: LeaveUpdate):
 @router.delete("/{leave_id}")
 async def delete_leave(leave_id: int):
     try:
-        existing_resp = supabase.table("leaves").select("id").eq("id", leave_id).execute()
-        if not get_supabase_data(existing_resp):
+        # PostgREST returns the deleted row, so an empty result means no match
+        result = await execute_async(supabase.table("leaves").delete().eq("id", leave_id))
+        if not get_supabase_data(result):
             raise HTTPException(status_code=404, detail=f"Leave with ID {leave_id} not found")
-        supabase.table("leaves").delete().eq("id", leave_id).execute()
+        _stats_cache.clear()
         return {"success": True, "detail": f"Leave {leave_id} deleted"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error deleting leave {leave_id}: {str(e)}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Error deleting leave: {str(e)}")
\ No newline at end of file
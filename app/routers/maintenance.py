@@ -1,9 +1,10 @@
 # backend/app/routes/maintenance.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date
-from app.supabase_client import supabase
+from app.supabase_client import supabase, execute_async
+from collections import Counter
 import logging
 import json
 
@@ -226,18 +227,90 @@ def prepare_data_for_response(data: dict) -> dict:
             result[key] = value
     return result
 
+def summarise_work_orders(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Bucket work orders by status and priority and tally overdue/progress in a single pass"""
+    today = date.today()
+    status_counts = Counter()
+    priority_counts = Counter()
+    overdue_count = 0
+    total_progress = 0
+    count_with_progress = 0
+
+    for record in records:
+        status = record.get('status', 'unknown')
+        status_counts[status] += 1
+        priority_counts[record.get('priority', 'unknown')] += 1
+
+        due_date_str = record.get('due_date')
+        if due_date_str and status != 'completed':
+            try:
+                if datetime.strptime(due_date_str, '%Y-%m-%d').date() < today:
+                    overdue_count += 1
+            except (ValueError, TypeError):
+                pass
+
+        progress = record.get('progress', 0)
+        if progress is not None:
+            total_progress += progress
+            count_with_progress += 1
+
+    return {
+        "total_records": len(records),
+        "status_breakdown": dict(status_counts),
+        "priority_breakdown": dict(priority_counts),
+        "overdue_count": overdue_count,
+        "average_progress": round(total_progress / count_with_progress) if count_with_progress > 0 else 0,
+    }
+
+# Indexes backing the get_work_orders filters (each one is an equality match
+# followed by the newest-first sort):
+#
+#   CREATE INDEX IF NOT EXISTS work_orders_status_created ON work_orders (status, created_at DESC);
+#   CREATE INDEX IF NOT EXISTS work_orders_priority_created ON work_orders (priority, created_at DESC);
+#   CREATE INDEX IF NOT EXISTS work_orders_allocated_created ON work_orders (allocated_to, created_at DESC);
+#   CREATE INDEX IF NOT EXISTS work_orders_created ON work_orders (created_at DESC, id DESC);
+#
+# The search filter is an ILIKE '%q%' on title/description, served by trigram indexes
+# (Postgres falls back to a scan for queries shorter than three characters):
+#
+#   CREATE EXTENSION IF NOT EXISTS pg_trgm;
+#   CREATE INDEX IF NOT EXISTS work_orders_title_trgm ON work_orders USING GIN (title gin_trgm_ops);
+#   CREATE INDEX IF NOT EXISTS work_orders_description_trgm ON work_orders USING GIN (description gin_trgm_ops);
+
+# Postgres function backing get_work_order_stats (every breakdown in one round trip),
+# created by migrations/008_work_order_stats.sql
+WORK_ORDER_STATS_RPC = "work_order_stats"
+
+def ilike_operand(term: str) -> str:
+    """Quote a search term as a PostgREST ilike operand that matches it as a literal substring"""
+    # Escape the LIKE wildcards so they match themselves
+    pattern = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    # PostgREST rewrites * to %, so let it match any single character (itself included) instead
+    pattern = pattern.replace("*", "_")
+    # Double-quote the operand so , . ( ) cannot end the value or add conditions to or=(...)
+    quoted = f"%{pattern}%".replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{quoted}"'
+
 # ==================== WORK ORDERS ENDPOINTS ====================
 @router.get("/work-orders")
 async def get_work_orders(
+    response: Response,
     status: Optional[str] = None,
     priority: Optional[str] = None,
     department: Optional[str] = None,
     allocated_to: Optional[str] = None,
-    to_department: Optional[str] = None
+    to_department: Optional[str] = None,
+    search: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; omit to get every work order")
 ):
     try:
-        query = supabase.table("work_orders").select("*")
+        # When paging, Postgres counts the filtered rows in the same request for X-Total-Count
+        query = supabase.table("work_orders").select("*", count="exact" if limit is not None else None)
         
+        if search:
+            operand = ilike_operand(search)
+            query = query.or_(f"title.ilike.{operand},description.ilike.{operand}")
         if status and status != 'all':
             query = query.eq("status", status)
         if priority and priority != 'all':
@@ -249,9 +322,16 @@ async def get_work_orders(
         if to_department and to_department != 'all':
             query = query.eq("to_department", to_department)
             
-        response = query.order("created_at", desc=True).execute()
-        
-        records = response.data or []
+        # id breaks created_at ties so range() pages neither repeat nor skip rows
+        query = query.order("created_at", desc=True).order("id", desc=True)
+        if limit is not None:
+            # Only the requested page leaves the database
+            query = query.range(skip, skip + limit - 1)
+        result = await execute_async(query)
+        if limit is not None and result.count is not None:
+            response.headers["X-Total-Count"] = str(result.count)
+        
+        records = result.data or []
         processed_records = []
         for record in records:
             processed_record = prepare_data_for_response(record)
@@ -323,21 +403,17 @@ async def get_work_order(work_order_id: int):
 @router.patch("/work-orders/{work_order_id}")
 async def update_work_order(work_order_id: int, updated: WorkOrderUpdate):
     try:
-        existing = supabase.table("work_orders").select("*").eq("id", work_order_id).execute()
-        if not existing.data:
-            raise HTTPException(status_code=404, detail="Work order not found")
-        
         data_to_update = {k: v for k, v in updated.dict().items() if v is not None}
         data_to_update = prepare_data_for_db(data_to_update)
         data_to_update["updated_at"] = datetime.utcnow().isoformat()
         
-        response = supabase.table("work_orders").update(data_to_update).eq("id", work_order_id).execute()
+        # A single UPDATE is atomic in Postgres, and PostgREST returns the updated
+        # row, so an empty result means no match (no separate existence check to race)
+        response = await execute_async(supabase.table("work_orders").update(data_to_update).eq("id", work_order_id))
         
-        if response.data:
-            result = prepare_data_for_response(response.data[0])
-            return result
-        else:
-            raise HTTPException(status_code=500, detail="Update failed")
+        if not response.data:
+            raise HTTPException(status_code=404, detail="Work order not found")
+        return prepare_data_for_response(response.data[0])
             
     except HTTPException:
         raise
@@ -348,11 +424,10 @@ async def update_work_order(work_order_id: int, updated: WorkOrderUpdate):
 @router.delete("/work-orders/{work_order_id}")
 async def delete_work_order(work_order_id: int):
     try:
-        existing = supabase.table("work_orders").select("*").eq("id", work_order_id).execute()
-        if not existing.data:
+        # PostgREST returns the deleted row, so an empty result means no match
+        response = await execute_async(supabase.table("work_orders").delete().eq("id", work_order_id))
+        if not response.data:
             raise HTTPException(status_code=404, detail="Work order not found")
-        
-        supabase.table("work_orders").delete().eq("id", work_order_id).execute()
         return {"success": True, "message": "Work order deleted successfully"}
         
     except HTTPException:
@@ -382,57 +457,25 @@ async def get_work_orders_by_allocated(allocated_to: str):
 @router.get("/work-orders/stats/summary")
 async def get_work_order_stats():
     try:
-        # Get total records count
-        records_response = supabase.table("work_orders").select("id", count="exact").execute()
-        total_records = len(records_response.data) if records_response.data else 0
-        
-        # Get records by status
-        status_response = supabase.table("work_orders").select("status").execute()
-        status_counts = {}
-        if status_response.data:
-            for record in status_response.data:
-                status = record.get('status', 'unknown')
-                status_counts[status] = status_counts.get(status, 0) + 1
-        
-        # Get records by priority
-        priority_response = supabase.table("work_orders").select("priority").execute()
-        priority_counts = {}
-        if priority_response.data:
-            for record in priority_response.data:
-                priority = record.get('priority', 'unknown')
-                priority_counts[priority] = priority_counts.get(priority, 0) + 1
-        
-        # Count overdue work orders
-        today = date.today()
-        records_all = supabase.table("work_orders").select("due_date, status").execute()
-        overdue_count = 0
-        
-        if records_all.data:
-            for record in records_all.data:
-                due_date_str = record.get('due_date')
-                status = record.get('status', 'pending')
-                
-                if due_date_str and status != 'completed':
-                    try:
-                        due_date = datetime.strptime(due_date_str, '%Y-%m-%d').date()
-                        if due_date < today:
-                            overdue_count += 1
-                    except (ValueError, TypeError):
-                        continue
-        
-        # Calculate average progress
-        progress_response = supabase.table("work_orders").select("progress").execute()
-        total_progress = 0
-        count_with_progress = 0
-        
-        if progress_response.data:
-            for record in progress_response.data:
-                progress = record.get('progress', 0)
-                if progress is not None:
-                    total_progress += progress
-                    count_with_progress += 1
-        
-        avg_progress = round(total_progress / count_with_progress) if count_with_progress > 0 else 0
+        summary = None
+        try:
+            stats_result = await execute_async(supabase.rpc(WORK_ORDER_STATS_RPC, {}))
+            summary = stats_result.data
+            if isinstance(summary, list):
+                summary = summary[0] if summary else None
+        except Exception as rpc_error:
+            logger.warning(f"work_order_stats RPC unavailable, aggregating in Python: {rpc_error}")
+
+        if not summary:
+            # Fallback: fetch only the four columns the stats need, in one query, and bucket them in one pass
+            response = await execute_async(supabase.table("work_orders").select("status, priority, due_date, progress"))
+            summary = summarise_work_orders(response.data or [])
+
+        total_records = summary.get("total_records") or 0
+        status_counts = summary.get("status_breakdown") or {}
+        priority_counts = summary.get("priority_breakdown") or {}
+        overdue_count = summary.get("overdue_count") or 0
+        avg_progress = summary.get("average_progress") or 0
         
         return {
             "total_records": total_records,
@@ -1,6 +1,10 @@
 # backend/app/supabase_client.py
 
 from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
+from typing import Any, Dict, Optional
+import asyncio
+import httpx
 import os
 import logging
 from dotenv import load_dotenv
@@ -18,4 +22,111 @@ if not SUPABASE_URL or not SUPABASE_KEY:
         "Database operations will fail. Set them in your .env file or deployment environment."
     )
 
-supabase: Client = create_client(SUPABASE_URL or "", SUPABASE_KEY or "")
\ No newline at end of file
+
+
+def create_pooled_client(url: str, key: str) -> Client:
+    """Create a Supabase client whose requests share one keep-alive HTTP/2 connection pool."""
+    http_client = httpx.Client(
+        # Limits live on the transport, which also retries failed connection attempts once
+        transport=httpx.HTTPTransport(
+            http2=True,
+            retries=1,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        ),
+        follow_redirects=True,
+        timeout=httpx.Timeout(10.0, connect=5.0),
+    )
+    return create_client(
+        url,
+        key,
+        options=SyncClientOptions(httpx_client=http_client, postgrest_client_timeout=10),
+    )
+
+
+# Shared by the routers that import it directly; pooled so calls reuse keep-alive connections
+supabase: Client = create_pooled_client(SUPABASE_URL or "", SUPABASE_KEY or "")
+
+
+def close_client(client: Optional[Client]):
+    """Close the HTTP connection pool of a client created by create_pooled_client."""
+    if client is not None and client.options.httpx_client is not None:
+        client.options.httpx_client.close()
+
+
+def warm_up(client: Optional[Client]):
+    """Open a pooled connection ahead of the first request and log whether the API answers."""
+    if client is None or client.options.httpx_client is None or not SUPABASE_URL:
+        return
+    try:
+        response = client.options.httpx_client.head(
+            f"{SUPABASE_URL}/rest/v1/", headers={"apikey": SUPABASE_KEY or ""}
+        )
+        logger.info(f"✅ Supabase reachable (HTTP {response.status_code}, {response.http_version})")
+    except Exception as e:
+        logger.warning(f"⚠️ Supabase warm-up failed: {e}")
+
+
+async def execute_async(query):
+    """Run a supabase-py query in a worker thread so it does not block the event loop."""
+    return await asyncio.to_thread(query.execute)
+
+
+class RowLoader:
+    """Coalesce concurrent single-row lookups on one column into a single IN query.
+
+    Keys requested within ``window`` seconds of each other (or until ``max_batch``
+    keys are pending) are fetched together; each caller gets its own row or None.
+    """
+
+    def __init__(self, client: Client, table: str, column: str, columns: str = "*",
+                 window: float = 0.003, max_batch: int = 200):
+        self.client = client
+        self.table = table
+        self.column = column
+        self.columns = columns
+        self.window = window
+        # Keeps the generated ?column=in.(...) URL well under PostgREST limits
+        self.max_batch = max_batch
+        self._pending: Dict[Any, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def load(self, key) -> Optional[dict]:
+        """Return the row whose column equals key, or None if there is none."""
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_batch:
+                self._dispatch()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._dispatch)
+        # Shield so one cancelled caller does not cancel the shared lookup
+        return await asyncio.shield(future)
+
+    def _dispatch(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._fetch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch: Dict[Any, asyncio.Future]):
+        try:
+            result = await execute_async(
+                self.client.table(self.table).select(self.columns).in_(self.column, list(batch))
+            )
+            rows = {}
+            for row in result.data or []:
+                rows.setdefault(row.get(self.column), row)
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(rows.get(key))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
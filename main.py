@@ -1,6 +1,7 @@
-﻿# main.py - COMPLETE VERSION WITH STANDBY, SHEQ, NEAR MISS, WORK STOPPAGE, PTO, VFL, AND PACHEDU ROUTERS INTEGRATED
+﻿# main.py - COMPLETE VERSION WITH SHEQ, NEAR MISS, WORK STOPPAGE, PTO, VFL, AND PACHEDU ROUTERS INTEGRATED
 from fastapi import FastAPI, APIRouter, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime, date
@@ -11,11 +12,12 @@ import sys
 import uuid
 from contextlib import asynccontextmanager
 
-# Import supabase client (used only for health check, standby router uses its own import)
-from app.supabase_client import supabase
+# Import the shared supabase client (warmed up and closed by the lifespan)
+from app.supabase_client import supabase, close_client, warm_up
+import asyncio
 
 # Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', force=True)
 logger = logging.getLogger(__name__)
 
 # ===== LIFESPAN CONTEXT MANAGER =====
@@ -23,8 +25,11 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting MyOffice API...")
+    # Handshake now so the first requests reuse open keep-alive connections
+    await asyncio.to_thread(warm_up, supabase)
     yield
     # Shutdown
+    close_client(supabase)
     logger.info("🛑 Shutting down MyOffice API...")
 
 app = FastAPI(
@@ -32,6 +37,7 @@ app = FastAPI(
     version="1.0.0",
     description="Complete office management system with equipment, employees, and spares inventory",
     redirect_slashes=True,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -62,7 +68,6 @@ async def root():
             "docs": "/docs",
             "daily_reports": "/api/daily-reports",
             "breakdowns": "/api/breakdowns",
-            "standby": "/api/standby",
             "sheq": "/api/sheq",
             "nearmiss": "/api/nearmiss",
             "work_stoppage": "/api/work-stoppage",
@@ -83,41 +88,16 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
-    try:
-        standby_resp = supabase.table("standby_schedules").select("*", count="exact", head=True).execute()
-        standby_count = standby_resp.count if hasattr(standby_resp, 'count') else 0
-    except Exception as e:
-        logger.error(f"Health check failed to get standby count: {e}")
-        standby_count = 0
-
     return {
         "status": "healthy", 
         "message": "API is running",
-        "timestamp": datetime.utcnow().isoformat(),
-        "standby_schedules": standby_count
+        "timestamp": datetime.utcnow().isoformat()
     }
 
 @app.get("/api/debug-test")
 async def debug_test():
     return {"message": "Debug test - working", "status": "success"}
 
-# ===== STANDBY ROUTER =====
-logger.info("🔄 Loading standby router...")
-try:
-    from app.routers.standby import router as standby_router
-    app.include_router(standby_router)
-    logger.info("✅ STANDBY ROUTER SUCCESSFULLY LOADED at /api/standby")
-except ImportError as e:
-    logger.error(f"❌ Failed to import standby router: {e}")
-    @app.get("/api/standby")
-    async def standby_fallback():
-        return {"message": "Standby router not loaded", "status": "fallback"}
-    @app.post("/api/standby")
-    async def standby_post_fallback():
-        raise HTTPException(status_code=503, detail="Standby router not available")
-except Exception as e:
-    logger.error(f"❌ Error including standby router: {e}")
-
 # ===== SHEQ INSPECTIONS ROUTER =====
 logger.info("🔄 Loading SHEQ inspections router...")
 try:
@@ -696,15 +676,12 @@ async def spares_fallback():
             ]
         }
 
-@app.get("/api/employees")
-@app.get("/api/employees/")
-async def employees_fallback():
-    if loaded_routers.get("employees"):
-        return {
-            "message": "Employees router is loaded",
-            "use_endpoint": "/api/employees for full functionality"
-        }
-    else:
+# Only registered when the router failed to load, so it never shadows the
+# router's "/" route (or the trailing-slash redirect to it)
+if not loaded_routers.get("employees"):
+    @app.get("/api/employees")
+    @app.get("/api/employees/")
+    async def employees_fallback():
         return {
             "message": "Employees router not loaded",
             "status": "fallback_mode",
@@ -727,7 +704,6 @@ async def debug_all_routes():
         "all_routes": routes,
         "total_routes": len(routes),
         "spares_routes": [r for r in routes if 'spares' in r['path']],
-        "standby_routes": [r for r in routes if 'standby' in r['path']],
         "sheq_routes": [r for r in routes if 'sheq' in r['path']],
         "nearmiss_routes": [r for r in routes if 'nearmiss' in r['path']],
         "work_stoppage_routes": [r for r in routes if 'work-stoppage' in r['path']],
@@ -750,7 +726,6 @@ async def debug_router_status():
     return {
         "critical_routers": {
             "spares": loaded_routers.get("spares") is not None,
-            "standby": True,
             "sheq": True,
             "nearmiss": True,
             "work_stoppage": True,
@@ -770,7 +745,6 @@ async def debug_router_status():
         "all_routers": {k: v is not None for k, v in loaded_routers.items()},
         "direct_endpoints_available": {
             "notices": True,
-            "standby": True,
             "sheq": True,
             "nearmiss": True,
             "work_stoppage": True,
@@ -997,15 +971,6 @@ async def test_all_connections():
         ]
     }
     
-    test_results["direct_standby"] = {
-        "available": True,
-        "endpoints": [
-            "GET /api/standby",
-            "POST /api/standby",
-            "GET /api/standby/{id}"
-        ]
-    }
-    
     test_results["direct_sheq"] = {
         "available": True,
         "endpoints": [
@@ -1134,13 +1099,6 @@ async def startup_event():
     logger.info("📊 Standalone Systems Status:")
     logger.info(f"   ✅ Availability endpoints available at /api/availabilities")
     logger.info(f"   📋 Currently {len(mock_equipment_db)} equipment in availability system")
-    logger.info(f"   ✅ Standby endpoints available at /api/standby")
-    try:
-        count_resp = supabase.table("standby_schedules").select("*", count="exact", head=True).execute()
-        count = count_resp.count if hasattr(count_resp, 'count') else 0
-        logger.info(f"   📋 Currently {count} schedules in standby system")
-    except:
-        logger.info(f"   📋 Standby schedules count unavailable")
     logger.info(f"   ✅ SHEQ endpoints available at /api/sheq")
     logger.info(f"   ✅ Near Miss endpoints available at /api/nearmiss")
     logger.info(f"   ✅ Work Stoppage endpoints available at /api/work-stoppage")
@@ -1161,7 +1119,6 @@ async def startup_event():
     
     route_categories = {
         "spares": [],
-        "standby": [],
         "sheq": [],
         "nearmiss": [],
         "work_stoppage": [],
@@ -1273,4 +1230,4 @@ async def shutdown_event():
 from mangum import Mangum
 handler = Mangum(app)
 
-logger.info("🏁 Main.py setup completed - Standby, SHEQ, Near Miss, Work Stoppage, PTO, VFL, and Pachedu routers integrated, other routers as before")
\ No newline at end of file
+logger.info("🏁 Main.py setup completed - SHEQ, Near Miss, Work Stoppage, PTO, VFL, and Pachedu routers integrated, other routers as before")
\ No newline at end of file
@@ -0,0 +1,13 @@
+-- leaves.total_days is derived by Postgres from the leave dates (app/routers/leaves.py
+-- no longer sends it). Apply BEFORE deploying the code that stops sending total_days:
+-- without this, inserts fail on NOT NULL or store NULL and the response model rejects them.
+BEGIN;
+
+ALTER TABLE leaves DROP COLUMN IF EXISTS total_days;
+ALTER TABLE leaves ADD COLUMN total_days integer
+  GENERATED ALWAYS AS (end_date - start_date + 1) STORED;
+
+ALTER TABLE leaves DROP CONSTRAINT IF EXISTS leaves_dates_ordered;
+ALTER TABLE leaves ADD CONSTRAINT leaves_dates_ordered CHECK (end_date >= start_date);
+
+COMMIT;
@@ -0,0 +1,8 @@
+-- leaves.applied_date is stamped by Postgres on insert (app/routers/leaves.py no longer
+-- sends it). Apply BEFORE deploying the code that stops sending applied_date: without
+-- the default, inserts fail on NOT NULL or store NULL and the response model rejects them.
+BEGIN;
+
+ALTER TABLE leaves ALTER COLUMN applied_date SET DEFAULT now();
+
+COMMIT;
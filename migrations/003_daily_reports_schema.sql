@@ -0,0 +1,37 @@
+-- daily_reports schema the daily reports router relies on. Apply BEFORE deploying
+-- the code that depends on it.
+
+BEGIN;
+
+-- create_report upserts on date (ON CONFLICT (date)), which needs a unique constraint.
+-- Its btree index also serves the date range filters in get_reports and the trend
+-- queries. Any rows sharing a date must be merged or removed first; list them with:
+--   SELECT date, count(*) FROM daily_reports GROUP BY date HAVING count(*) > 1;
+ALTER TABLE daily_reports DROP CONSTRAINT IF EXISTS daily_reports_date_key;
+ALTER TABLE daily_reports ADD CONSTRAINT daily_reports_date_key UNIQUE (date);
+
+-- call_outs and equipment are jsonb, sent and returned as native arrays (the stats and
+-- trend code reads them as lists of objects). Empty strings become NULL.
+ALTER TABLE daily_reports
+    ALTER COLUMN call_outs TYPE jsonb USING NULLIF(call_outs::text, '')::jsonb,
+    ALTER COLUMN equipment TYPE jsonb USING NULLIF(equipment::text, '')::jsonb;
+
+-- Timestamps are maintained by the database; create_report does not send them.
+ALTER TABLE daily_reports
+    ALTER COLUMN created_at SET DEFAULT now(),
+    ALTER COLUMN updated_at SET DEFAULT now();
+
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS daily_reports_set_updated_at ON daily_reports;
+CREATE TRIGGER daily_reports_set_updated_at
+    BEFORE UPDATE ON daily_reports
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+COMMIT;
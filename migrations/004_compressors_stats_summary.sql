@@ -0,0 +1,20 @@
+-- stats_summary() backs GET /api/compressors/stats: every aggregate in one round trip.
+-- Until it exists the endpoint pays for a failing RPC call before its Python fallback,
+-- so apply it together with (or before) the code that calls it.
+
+CREATE OR REPLACE FUNCTION stats_summary()
+RETURNS TABLE (total_compressors bigint, total_running_hours double precision,
+               total_loaded_hours double precision, active_compressors bigint,
+               avg_efficiency double precision, upcoming_services bigint)
+LANGUAGE sql STABLE AS $$
+  SELECT COUNT(*),
+         COALESCE(SUM(total_running_hours), 0),
+         COALESCE(SUM(total_loaded_hours), 0),
+         COUNT(*) FILTER (WHERE status IN ('running', 'standby')),
+         COALESCE(AVG(total_loaded_hours * 100.0 / NULLIF(total_running_hours, 0)), 0),
+         COUNT(*) FILTER (WHERE EXISTS (
+             SELECT 1 FROM unnest(ARRAY[1000, 2000, 4000, 8000, 16000]) AS i
+             WHERE i > COALESCE(total_running_hours, 0)
+               AND i - COALESCE(total_running_hours, 0) <= 240))
+  FROM compressors;
+$$;
@@ -0,0 +1,16 @@
+-- daily_report_stats() backs GET /api/daily-reports/stats/summary: the aggregates are
+-- computed in the database. Requires the jsonb call_outs column from 003. Apply before
+-- deploying; without it every call pays for a failing RPC before the Python fallback.
+
+CREATE OR REPLACE FUNCTION daily_report_stats(p_start date DEFAULT NULL, p_end date DEFAULT NULL)
+RETURNS TABLE (total_reports bigint, avg_plant numeric, total_callout_hours numeric, avg_dam numeric)
+LANGUAGE sql STABLE AS $$
+  SELECT COUNT(*),
+         COALESCE(AVG(r.plant_availability_percent), 0),
+         COALESCE(SUM((SELECT SUM((co->>'duration_hours')::numeric)
+                        FROM jsonb_array_elements(COALESCE(r.call_outs, '[]'::jsonb)) co)), 0),
+         COALESCE(AVG(r.dam_level), 0)
+  FROM daily_reports r
+  WHERE (p_start IS NULL OR r.date >= p_start)
+    AND (p_end IS NULL OR r.date <= p_end);
+$$;
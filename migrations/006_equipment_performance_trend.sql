@@ -0,0 +1,33 @@
+-- equipment_daily_perf and equipment_performance_trend() back
+-- GET /api/daily-reports/trends/equipment-performance: equipment JSON is unnested and
+-- grouped by name in the database. Requires the jsonb equipment column from 003.
+-- Apply before deploying; without it every call pays for a failing RPC first.
+
+CREATE OR REPLACE VIEW equipment_daily_perf AS
+  SELECT r.date,
+         e->>'name' AS name,
+         e->>'category' AS category,
+         COALESCE(NULLIF(e->>'actual', '')::float, 0) AS actual
+  FROM daily_reports r,
+       LATERAL jsonb_array_elements(COALESCE(r.equipment, '[]'::jsonb)) e
+  WHERE COALESCE(e->>'name', '') <> '';
+
+CREATE OR REPLACE FUNCTION equipment_performance_trend(
+    p_start date DEFAULT NULL, p_end date DEFAULT NULL, p_limit int DEFAULT 30)
+RETURNS TABLE (name text, category text, performance_data float[], dates date[])
+LANGUAGE sql STABLE AS $$
+  WITH recent AS (
+    SELECT date FROM daily_reports
+    WHERE (p_start IS NULL OR date >= p_start) AND (p_end IS NULL OR date <= p_end)
+    ORDER BY date DESC
+    LIMIT p_limit
+  )
+  SELECT p.name,
+         (array_agg(p.category ORDER BY p.date DESC))[1],
+         array_agg(p.actual ORDER BY p.date DESC),
+         array_agg(p.date ORDER BY p.date DESC)
+  FROM equipment_daily_perf p
+  JOIN recent USING (date)
+  GROUP BY p.name
+  ORDER BY COUNT(*) DESC;
+$$;
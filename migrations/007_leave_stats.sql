@@ -0,0 +1,18 @@
+-- leave_stats() backs GET /api/leaves/stats/summary: all six counts in one round trip,
+-- with an index for the status/date filters. Apply before deploying; without it every
+-- uncached call pays for a failing RPC before the count-query fallback.
+
+CREATE OR REPLACE FUNCTION leave_stats()
+RETURNS json LANGUAGE sql STABLE AS $$
+  SELECT json_build_object(
+    'total',        count(*),
+    'pending',      count(*) FILTER (WHERE status = 'pending'),
+    'approved',     count(*) FILTER (WHERE status = 'approved'),
+    'rejected',     count(*) FILTER (WHERE status = 'rejected'),
+    'on_leave_now', count(*) FILTER (WHERE status = 'approved'
+                                       AND start_date <= current_date AND end_date >= current_date),
+    'upcoming',     count(*) FILTER (WHERE status = 'approved' AND start_date > current_date))
+  FROM leaves;
+$$;
+
+CREATE INDEX IF NOT EXISTS leaves_status_dates ON leaves (status, start_date, end_date);
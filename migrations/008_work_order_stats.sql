@@ -0,0 +1,18 @@
+-- work_order_stats() backs GET /api/maintenance/work-orders/stats/summary: every
+-- breakdown in one round trip. Apply before deploying; without it every call pays for
+-- a failing RPC before the single-query Python fallback.
+
+CREATE OR REPLACE FUNCTION work_order_stats()
+RETURNS json LANGUAGE sql STABLE AS $$
+  SELECT json_build_object(
+    'total_records',      (SELECT count(*) FROM work_orders),
+    'status_breakdown',   (SELECT coalesce(json_object_agg(status, n), '{}')
+                             FROM (SELECT coalesce(status, 'unknown') AS status, count(*) AS n
+                                     FROM work_orders GROUP BY 1) s),
+    'priority_breakdown', (SELECT coalesce(json_object_agg(priority, n), '{}')
+                             FROM (SELECT coalesce(priority, 'unknown') AS priority, count(*) AS n
+                                     FROM work_orders GROUP BY 1) p),
+    'overdue_count',      (SELECT count(*) FROM work_orders
+                             WHERE due_date < current_date AND status IS DISTINCT FROM 'completed'),
+    'average_progress',   (SELECT coalesce(round(avg(progress)), 0) FROM work_orders));
+$$;
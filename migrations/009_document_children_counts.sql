@@ -0,0 +1,12 @@
+-- document_children_counts() backs the folder listings: live (non-deleted) child
+-- counts for a batch of folders in one GROUP BY. Apply before deploying; without it
+-- every listing pays for a failing RPC before the Counter fallback.
+
+CREATE OR REPLACE FUNCTION document_children_counts(parent_ids uuid[])
+RETURNS TABLE (parent_id uuid, cnt bigint)
+LANGUAGE sql STABLE AS $$
+  SELECT d.parent_id, COUNT(*)
+  FROM documents d
+  WHERE d.parent_id = ANY(parent_ids) AND d.status <> 'deleted'
+  GROUP BY d.parent_id;
+$$;
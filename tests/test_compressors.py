@@ -0,0 +1,13 @@
+import pytest
+
+from app.routers.compressors import validate_date_format
+
+
+@pytest.mark.parametrize("value", ["2024-02-29", "2024-12-31"])
+def test_accepts_calendar_dates(value):
+    assert validate_date_format(value)
+
+
+@pytest.mark.parametrize("value", ["2024-02-30", "2023-02-29", "2024-01-01\n", "2024-1-01", "2024-13-01"])
+def test_rejects_impossible_or_malformed_dates(value):
+    assert not validate_date_format(value)
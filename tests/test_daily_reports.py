@@ -0,0 +1,17 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import daily_reports
+
+
+def test_reports_fail_with_503_without_credentials(monkeypatch):
+    monkeypatch.setattr(daily_reports, "SUPABASE_URL", None)
+    app = FastAPI()
+    app.include_router(daily_reports.router, prefix="/api/daily-reports")
+    client = TestClient(app)
+
+    response = client.get("/api/daily-reports/")
+    assert response.status_code == 503
+
+    response = client.get("/api/daily-reports/stats/summary")
+    assert response.status_code == 503
@@ -0,0 +1,51 @@
+import importlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import inventory
+
+
+@pytest.fixture
+def client():
+    # The router keeps its mock data and indexes at module level; reload for a clean store
+    module = importlib.reload(inventory)
+    app = FastAPI()
+    app.include_router(module.router)
+    return TestClient(app)
+
+
+def test_null_stock_update_keeps_item_indexed(client):
+    before = client.get("/api/inventory/stats").json()
+
+    response = client.put("/api/inventory/items/inv-001", json={"currentStock": None})
+    assert response.status_code == 200
+    assert response.json()["currentStock"] == 45
+
+    electronics = client.get("/api/inventory/items", params={"category": "Electronics"}).json()
+    assert "inv-001" in [item["id"] for item in electronics]
+    assert client.get("/api/inventory/stats").json() == before
+
+
+def test_failed_update_leaves_indexes_untouched(client, monkeypatch):
+    before = client.get("/api/inventory/stats").json()
+
+    def fail(current_stock, min_stock):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(inventory, "calculate_status", fail)
+    with pytest.raises(RuntimeError):
+        client.put("/api/inventory/items/inv-001", json={"currentStock": 5, "category": "Tools"})
+
+    electronics = client.get("/api/inventory/items", params={"category": "Electronics"}).json()
+    assert "inv-001" in [item["id"] for item in electronics]
+    assert client.get("/api/inventory/stats").json() == before
+
+
+def test_total_value_is_zero_once_every_item_is_deleted(client):
+    for item in client.get("/api/inventory/items").json():
+        client.put(f"/api/inventory/items/{item['id']}", json={"currentStock": item["currentStock"] + 3})
+        assert client.delete(f"/api/inventory/items/{item['id']}").status_code == 200
+
+    assert client.get("/api/inventory/stats").json()["totalValue"] == 0
@@ -0,0 +1,18 @@
+from app.routers.maintenance import ilike_operand
+
+
+def test_ilike_operand_quotes_postgrest_delimiters():
+    assert ilike_operand("pump, motor") == '"%pump, motor%"'
+    assert ilike_operand("seal (new).v2") == '"%seal (new).v2%"'
+
+
+def test_ilike_operand_cannot_add_conditions():
+    # The injected ",status.eq.completed" stays inside the quoted operand
+    assert ilike_operand('x",status.eq.completed') == '"%x\\",status.eq.completed%"'
+
+
+def test_ilike_operand_escapes_like_wildcards():
+    assert ilike_operand("50%") == '"%50\\\\%%"'
+    assert ilike_operand("a_b") == '"%a\\\\_b%"'
+    assert ilike_operand("a*b") == '"%a_b%"'
+    assert ilike_operand("a\\b") == '"%a\\\\\\\\b%"'